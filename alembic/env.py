@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from src.config import settings
 from src.database.tables import Base
+from src.database.partitions import blacklisted_tokens_partitions
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -36,6 +37,13 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", settings.db.async_dsn)
 
 
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # партиции создаются и удаляются фоновой задачей, а не миграциями
+    if type_ == "table" and reflected and compare_to is None:
+        return not blacklisted_tokens_partitions.is_partition(name)
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -54,6 +62,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,7 +70,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
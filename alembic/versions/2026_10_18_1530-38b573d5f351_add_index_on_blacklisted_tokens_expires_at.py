@@ -0,0 +1,35 @@
+"""Add index on blacklisted_tokens.expires_at
+
+Revision ID: 38b573d5f351
+Revises: 2c7720c2e6popa
+Create Date: 2026-10-18 15:30:00.000000
+
+"""
+
+from typing import Union, Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "38b573d5f351"
+down_revision: Union[str, Sequence[str], None] = "2c7720c2e6popa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индекс нужен фоновой очистке истекших токенов
+    op.create_index(
+        op.f("ix_blacklisted_tokens_expires_at"),
+        "blacklisted_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_blacklisted_tokens_expires_at"), table_name="blacklisted_tokens"
+    )
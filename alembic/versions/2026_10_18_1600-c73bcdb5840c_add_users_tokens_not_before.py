@@ -0,0 +1,37 @@
+"""Add users.tokens_not_before
+
+Revision ID: c73bcdb5840c
+Revises: 38b573d5f351
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Union, Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c73bcdb5840c"
+down_revision: Union[str, Sequence[str], None] = "38b573d5f351"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "tokens_not_before",
+            sa.BigInteger(),
+            nullable=True,
+            comment="Unix timestamp, токены выпущенные раньше которого недействительны",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "tokens_not_before")
@@ -0,0 +1,125 @@
+"""Partition blacklisted_tokens by expires_at
+
+Revision ID: 5e0f4b9a2d17
+Revises: c73bcdb5840c
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Union, Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0f4b9a2d17"
+down_revision: Union[str, Sequence[str], None] = "c73bcdb5840c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("jti", sa.String(length=255), nullable=False),
+        sa.Column("token_type", sa.String(length=50), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("expires_at", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.BigInteger(),
+            server_default=sa.text("EXTRACT(EPOCH FROM NOW())::INTEGER"),
+            nullable=False,
+            comment="Unix timestamp создания записи (секунды от epoch)",
+        ),
+        sa.Column(
+            "updated_at",
+            sa.BigInteger(),
+            server_default=sa.text("EXTRACT(EPOCH FROM NOW())::INTEGER"),
+            nullable=True,
+            comment="Unix timestamp последнего обновления записи (секунды от epoch)",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_blacklisted_tokens_user_id_users"),
+            ondelete="CASCADE",
+        ),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        op.f("ix_blacklisted_tokens_updated_at"),
+        "blacklisted_tokens",
+        ["updated_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_blacklisted_tokens_expires_at"),
+        "blacklisted_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+COPY_COLUMNS = "id, jti, token_type, user_id, expires_at, created_at, updated_at"
+
+
+def _restore_rows() -> None:
+    op.execute(
+        f"INSERT INTO blacklisted_tokens ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM blacklisted_tokens_backup"
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('blacklisted_tokens', 'id'), "
+        "COALESCE((SELECT max(id) FROM blacklisted_tokens), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE blacklisted_tokens_backup")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # истекшие токены не переносятся; имена ограничений и индексов
+    # совпадают со старыми, поэтому старая таблица удаляется до создания новой
+    op.execute(
+        "CREATE TEMP TABLE blacklisted_tokens_backup AS SELECT * FROM blacklisted_tokens "
+        "WHERE expires_at >= EXTRACT(EPOCH FROM NOW())::BIGINT"
+    )
+    op.drop_table("blacklisted_tokens")
+
+    op.create_table(
+        "blacklisted_tokens",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "expires_at", name=op.f("pk_blacklisted_tokens")),
+        sa.UniqueConstraint(
+            "jti", "expires_at", name=op.f("uq_blacklisted_tokens_jti")
+        ),
+        postgresql_partition_by="RANGE (expires_at)",
+    )
+    _create_indexes()
+    # дневные партиции создает src/tasks/blacklist_reaper.py, перенося в них строки
+    # из партиции по умолчанию
+    op.execute(
+        "CREATE TABLE blacklisted_tokens_default PARTITION OF blacklisted_tokens DEFAULT"
+    )
+    _restore_rows()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "CREATE TEMP TABLE blacklisted_tokens_backup AS SELECT * FROM blacklisted_tokens"
+    )
+    # вместе с родительской таблицей удаляются все партиции
+    op.drop_table("blacklisted_tokens")
+
+    op.create_table(
+        "blacklisted_tokens",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_blacklisted_tokens")),
+        sa.UniqueConstraint("jti", name=op.f("uq_blacklisted_tokens_jti")),
+    )
+    _create_indexes()
+    _restore_rows()
@@ -0,0 +1,112 @@
+"""Add devices and device sessions
+
+Revision ID: 4b8bee115703
+Revises: 5e0f4b9a2d17
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Union, Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b8bee115703"
+down_revision: Union[str, Sequence[str], None] = "5e0f4b9a2d17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamp_column(name: str, nullable: bool = False) -> sa.Column:
+    return sa.Column(
+        name,
+        sa.BigInteger(),
+        server_default=sa.text("EXTRACT(EPOCH FROM NOW())::INTEGER"),
+        nullable=nullable,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "devices",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "device_type",
+            sa.Enum("MOBILE", "DESKTOP", "WEB", name="devicetype"),
+            nullable=True,
+        ),
+        sa.Column("brand", sa.String(), nullable=True),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("platform_name", sa.String(), nullable=True),
+        sa.Column("platform_version", sa.String(), nullable=True),
+        sa.Column("browser_name", sa.String(), nullable=True),
+        sa.Column("browser_version", sa.String(), nullable=True),
+        sa.Column("app_name", sa.String(), nullable=True),
+        sa.Column("app_version", sa.String(), nullable=True),
+        sa.Column("app_build", sa.String(), nullable=True),
+        sa.Column("is_trusted", sa.Boolean(), nullable=False),
+        sa.Column(
+            "id", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        _timestamp_column("first_seen"),
+        _timestamp_column("last_seen"),
+        _timestamp_column("created_at"),
+        _timestamp_column("updated_at", nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_devices_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_devices")),
+    )
+    op.create_index(op.f("ix_devices_id"), "devices", ["id"], unique=False)
+    op.create_index(op.f("ix_devices_user_id"), "devices", ["user_id"], unique=False)
+    op.create_index(
+        op.f("ix_devices_updated_at"), "devices", ["updated_at"], unique=False
+    )
+
+    op.create_table(
+        "device_sessions",
+        sa.Column("device_id", sa.UUID(), nullable=False),
+        sa.Column("ip_address", sa.String(), nullable=True),
+        sa.Column("user_agent", sa.String(), nullable=True),
+        sa.Column(
+            "id", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        _timestamp_column("last_seen"),
+        _timestamp_column("created_at"),
+        _timestamp_column("updated_at", nullable=True),
+        sa.ForeignKeyConstraint(
+            ["device_id"],
+            ["devices.id"],
+            name=op.f("fk_device_sessions_device_id_devices"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_device_sessions")),
+    )
+    op.create_index(
+        op.f("ix_device_sessions_id"), "device_sessions", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_device_sessions_device_id"),
+        "device_sessions",
+        ["device_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_device_sessions_updated_at"),
+        "device_sessions",
+        ["updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("device_sessions")
+    op.drop_table("devices")
+    sa.Enum(name="devicetype").drop(op.get_bind())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Бенчмарк выпуска и проверки JWT для поддерживаемых алгоритмов.
+#
+# Для каждого алгоритма ключи генерируются в памяти, затем измеряется количество
+# токенов в секунду при выпуске (encode) и проверке (decode):
+#   - pem: ключ передается PEM-строкой и разбирается PyJWT на каждом вызове
+#   - key: ключ заранее загружен в объект cryptography (как в src/security/keys.py)
+#
+# Запуск:
+#   uv run scripts/bench_jwt.py --seconds 2
+
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone, timedelta
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa, ed25519
+
+
+def generate_keys(algorithm: str):
+    match algorithm:
+        case "RS256":
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        case "ES256":
+            private_key = ec.generate_private_key(ec.SECP256R1())
+        case "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        case _:
+            raise ValueError(f"Алгоритм '{algorithm}' не поддерживается")
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+    public_pem = (
+        private_key.public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+    return private_key, private_key.public_key(), private_pem, public_pem
+
+
+def make_payload() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "sub": "user@example.com",
+        "role": "USER",
+        "type": "access",
+        "jti": str(uuid.uuid4()),
+        "exp": now + timedelta(minutes=15),
+        "iat": now,
+    }
+
+
+def measure(func, seconds: float) -> float:
+    """Возвращает количество вызовов `func` в секунду"""
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк алгоритмов подписи JWT")
+    parser.add_argument(
+        "--seconds", type=float, default=2.0, help="Длительность каждого замера, с"
+    )
+    parser.add_argument(
+        "--algorithms", nargs="+", default=["RS256", "ES256", "EdDSA"]
+    )
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<10}{'key':<6}{'issue/s':>12}{'verify/s':>12}{'size, B':>10}")
+    for algorithm in args.algorithms:
+        private_key, public_key, private_pem, public_pem = generate_keys(algorithm)
+
+        for key_kind, sign_key, verify_key in (
+            ("pem", private_pem, public_pem),
+            ("key", private_key, public_key),
+        ):
+            token = jwt.encode(make_payload(), sign_key, algorithm=algorithm)
+
+            issue_rate = measure(
+                lambda: jwt.encode(make_payload(), sign_key, algorithm=algorithm),
+                args.seconds,
+            )
+            verify_rate = measure(
+                lambda: jwt.decode(token, verify_key, algorithms=[algorithm]),
+                args.seconds,
+            )
+            print(
+                f"{algorithm:<10}{key_kind:<6}{issue_rate:>12.0f}"
+                f"{verify_rate:>12.0f}{len(token):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Бенчмарк: как меняется задержка "других" эндпоинтов, пока идут логины.
+#
+# Пробник каждые несколько миллисекунд имитирует лёгкий запрос к другому эндпоинту
+# и измеряет, сколько он ждал event loop. Параллельно выполняются логины
+# (bcrypt.checkpw) в двух режимах:
+#   - inline: как раньше, прямо в корутине (блокирует event loop)
+#   - pool:   через PasswordHasher (пул воркеров)
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run scripts/bench_password_hashing.py --logins 40 --concurrency 8
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.security import hashing_encoding
+from src.security.password_hasher import PasswordHasher
+
+
+def percentile(data: list[float], p: int) -> float:
+    if len(data) < 2:
+        return data[0] if data else 0.0
+    return statistics.quantiles(data, n=100, method="inclusive")[p - 1]
+
+
+async def probe(latencies: list[float], stop: asyncio.Event, interval: float):
+    # имитация лёгкого запроса к другому эндпоинту
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def run_logins(mode: str, hashed: str, args) -> dict:
+    hasher = PasswordHasher(
+        executor=args.executor,
+        max_workers=args.workers,
+        max_queue_depth=args.logins,
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                hashing_encoding.verify_password(args.password, hashed)
+                # отдаем управление, как это сделал бы реальный обработчик
+                await asyncio.sleep(0)
+            else:
+                await hasher.verify_password(args.password, hashed)
+
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(latencies, stop, args.probe_interval))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    await hasher.shutdown()
+
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "logins_per_s": args.logins / elapsed,
+        "probe_p50_ms": percentile(latencies, 50) * 1000,
+        "probe_p99_ms": percentile(latencies, 99) * 1000,
+        "probe_max_ms": max(latencies) * 1000 if latencies else 0.0,
+        "hasher": hasher.metrics.snapshot() if mode == "pool" else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Задержка других эндпоинтов во время логинов"
+    )
+    parser.add_argument("--logins", type=int, default=40, help="Количество логинов")
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Одновременных логинов"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Воркеров в пуле")
+    parser.add_argument(
+        "--executor", choices=["thread", "process"], default="thread"
+    )
+    parser.add_argument(
+        "--probe-interval", type=float, default=0.005, help="Период пробника, с"
+    )
+    parser.add_argument("--password", default="correct horse battery staple")
+    args = parser.parse_args()
+
+    hashed = hashing_encoding.hash_password(args.password).decode()
+
+    # базовая линия без нагрузки
+    baseline: list[float] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(baseline, stop, args.probe_interval))
+    await asyncio.sleep(1)
+    stop.set()
+    await task
+    print(
+        f"baseline: p50={percentile(baseline, 50) * 1000:.3f} ms "
+        f"p99={percentile(baseline, 99) * 1000:.3f} ms"
+    )
+
+    for mode in ("inline", "pool"):
+        result = await run_logins(mode, hashed, args)
+        print(
+            f"{result['mode']:>6}: {result['logins_per_s']:.1f} logins/s, "
+            f"p50={result['probe_p50_ms']:.3f} ms "
+            f"p99={result['probe_p99_ms']:.3f} ms "
+            f"max={result['probe_max_ms']:.3f} ms"
+        )
+        if result["hasher"]:
+            print(f"        hasher: {result['hasher']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Микробенчмарк запросов к таблице users: загрузка ORM-сущности против проекций.
+#
+# Для каждого горячего пути сравниваются:
+#   - orm:  select(User) с созданием сущности в identity map (как было раньше)
+#   - core: EXISTS / одна колонка / именованный кортеж из src/database/crud/users.py
+#
+# Все итерации идут в одной сессии (одно соединение, без накладных расходов пула),
+# identity map очищается после каждой итерации.
+# Берется первый пользователь из БД, поэтому таблица не должна быть пустой.
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run scripts/bench_user_queries.py --iterations 2000
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select
+
+from src.database import database
+from src.entities import UserStatus
+from src.database.crud import users
+from src.schemas.users import UserSnapshot
+from src.database.tables import User
+
+
+async def orm_get_user(session, user_id: int, email: str):
+    return await session.scalar(select(User).where(User.email == email))
+
+
+async def orm_user_exists(session, user_id: int, email: str):
+    return await session.scalar(select(User).where(User.id == user_id)) is not None
+
+
+async def orm_email_verified(session, user_id: int, email: str):
+    user = await session.scalar(select(User).where(User.id == user_id))
+    return user.status == UserStatus.ACTIVATED
+
+
+async def orm_snapshot(session, user_id: int, email: str):
+    user = await session.scalar(select(User).where(User.email == email))
+    return UserSnapshot.model_validate(user)
+
+
+async def orm_status_and_email(session, user_id: int, email: str):
+    # как было в /send-verification/: сущность и повторный запрос статуса
+    user = await session.scalar(select(User).where(User.id == user_id))
+    user = await session.scalar(select(User).where(User.id == user_id))
+    return user.status, user.email
+
+
+CASES = {
+    "get_user_credentials": (
+        orm_get_user,
+        lambda session, user_id, email: users.get_user_credentials(session, email),
+    ),
+    "is_user_exists": (
+        orm_user_exists,
+        lambda session, user_id, email: users.is_user_exists(session, user_id),
+    ),
+    "is_user_email_verified": (
+        orm_email_verified,
+        lambda session, user_id, email: users.is_user_email_verified(session, user_id),
+    ),
+    "get_user_snapshot": (
+        orm_snapshot,
+        lambda session, user_id, email: users.get_user_snapshot(session, email),
+    ),
+    "get_user_status_and_email": (
+        orm_status_and_email,
+        lambda session, user_id, email: users.get_user_status_and_email(
+            session, user_id
+        ),
+    ),
+}
+
+
+async def measure(query, user_id: int, email: str, iterations: int) -> list[float]:
+    timings = []
+    async with database.session_factory() as session:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await query(session, user_id, email)
+            timings.append(time.perf_counter() - started)
+            # очищаем identity map, чтобы ORM-загрузка каждый раз создавала сущность
+            session.expunge_all()
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк ORM-загрузок и проекций в CRUD пользователей"
+    )
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    args = parser.parse_args()
+
+    async with database.session_factory() as session:
+        row = (await session.execute(select(User.id, User.email).limit(1))).first()
+    if row is None:
+        print("Таблица users пуста")
+        return
+    user_id, email = row
+
+    print(f"{'query':<28}{'mode':<6}{'mean, us':>10}{'p50, us':>10}{'p99, us':>10}")
+    try:
+        for name, modes in CASES.items():
+            for mode, query in zip(("orm", "core"), modes):
+                await measure(query, user_id, email, args.warmup)
+                timings = await measure(query, user_id, email, args.iterations)
+                p99 = statistics.quantiles(timings, n=100, method="inclusive")[98]
+                print(
+                    f"{name:<28}{mode:<6}"
+                    f"{statistics.fmean(timings) * 1e6:>10.0f}"
+                    f"{statistics.median(timings) * 1e6:>10.0f}"
+                    f"{p99 * 1e6:>10.0f}"
+                )
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
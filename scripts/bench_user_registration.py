@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Бенчмарк всплеска регистраций: создание пользователей в БД.
+#
+# Сравниваются два способа создания пользователя:
+#   - orm:    session.add + commit + refresh (как было раньше), занятый email
+#             обнаруживается по IntegrityError
+#   - upsert: INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id
+#             (src/database/crud/users.py:create_user)
+#
+# Регистрации выполняются конкурентно, часть email повторяется (--duplicates),
+# для каждой фиксируется время и число SQL-запросов (round trip).
+# Хэширование пароля не измеряется - передается готовая строка.
+# Созданные пользователи удаляются после замера.
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run scripts/bench_user_registration.py --registrations 2000 --concurrency 20
+
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, delete
+from sqlalchemy.exc import IntegrityError
+
+from src.database import database
+from src.database.crud import users
+from src.schemas.users import UserCreateIn
+from src.database.tables import User
+
+PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+statements = 0
+
+
+@event.listens_for(database.engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def create_orm(user_create: UserCreateIn) -> int | None:
+    async with database.session_factory() as session:
+        user = User(**user_create.model_dump())
+        session.add(user)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return None
+        await session.refresh(user)
+        return user.id
+
+
+async def create_upsert(user_create: UserCreateIn) -> int | None:
+    async with database.session_factory() as session:
+        return await users.create_user(session=session, user_create=user_create)
+
+
+async def run(create, emails: list[str], concurrency: int) -> tuple[list[float], float]:
+    timings = []
+    queue = asyncio.Queue()
+    for email in emails:
+        queue.put_nowait(email)
+
+    async def worker():
+        while not queue.empty():
+            email = queue.get_nowait()
+            user_create = UserCreateIn(email=email, password=PASSWORD_HASH)
+            started = time.perf_counter()
+            await create(user_create)
+            timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings, time.perf_counter() - started
+
+
+async def main():
+    global statements
+
+    parser = argparse.ArgumentParser(description="Бенчмарк всплеска регистраций")
+    parser.add_argument("--registrations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--duplicates", type=float, default=0.2, help="Доля повторных email"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<8}{'reg/s':>8}{'p50, ms':>10}{'p99, ms':>10}{'queries/reg':>13}"
+    )
+    try:
+        for mode, create in (("orm", create_orm), ("upsert", create_upsert)):
+            prefix = f"bench-{mode}-{uuid.uuid4().hex[:8]}"
+            unique = int(args.registrations * (1 - args.duplicates))
+            emails = [f"{prefix}-{i}@example.com" for i in range(unique)]
+            emails += random.choices(emails, k=args.registrations - unique)
+            random.shuffle(emails)
+
+            statements = 0
+            timings, elapsed = await run(create, emails, args.concurrency)
+            p99 = statistics.quantiles(timings, n=100, method="inclusive")[98]
+            print(
+                f"{mode:<8}{len(timings) / elapsed:>8.0f}"
+                f"{statistics.median(timings) * 1e3:>10.2f}{p99 * 1e3:>10.2f}"
+                f"{statements / len(timings):>13.2f}"
+            )
+
+            async with database.session_factory() as session:
+                await session.execute(
+                    delete(User).where(User.email.startswith(prefix))
+                )
+                await session.commit()
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
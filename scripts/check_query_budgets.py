@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Проверка бюджетов запросов к БД для эндпоинтов.
+#
+# Выполняет основные сценарии через ASGI-транспорт (без запуска сервера) и проверяет
+# с помощью `assert_max_queries`, что каждый эндпоинт делает не больше запросов к БД,
+# чем указано в BUDGETS. При превышении печатает выполненные запросы и завершается
+# с кодом 1 - так регрессия запросов ломает CI, а не продакшен.
+#
+# Нужны работающие Postgres и Redis. Создает временного пользователя и удаляет его.
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run scripts/check_query_budgets.py
+
+import os
+import sys
+import uuid
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from src.app import app, startup, shutdown
+from src.utils.redis_client import redis_client
+from src.database.query_stats import assert_max_queries
+
+# эндпоинт -> максимальное количество запросов к БД
+BUDGETS = {
+    "POST /users/create/": 1,
+    "POST /users/verify-code/": 1,
+    "POST /auth/login/": 2,
+    "GET /users/me/": 1,
+    "POST /auth/refresh/": 0,
+    "GET /users/": 1,
+    "POST /auth/logout/": 1,
+    "DELETE /users/delete/{id}": 1,
+}
+
+
+async def check(name: str, request) -> httpx.Response:
+    try:
+        with assert_max_queries(BUDGETS[name]) as stats:
+            response = await request
+    except AssertionError as e:
+        print(f"FAIL {name}: {e}")
+        raise
+    print(f"ok   {name}: {stats.queries}/{BUDGETS[name]} queries")
+    return response
+
+
+async def main() -> int:
+    await startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test/api/v1"
+        ) as client:
+            email = f"budget-{uuid.uuid4().hex[:12]}@example.com"
+            credentials = {"email": email, "password": "password"}
+
+            response = await check(
+                "POST /users/create/", client.post("/users/create/", json=credentials)
+            )
+            user_id = response.json()["id"]
+
+            try:
+                await redis_client.set_verification_code(email, "000000")
+                await check(
+                    "POST /users/verify-code/",
+                    client.post(
+                        "/users/verify-code/", json={"email": email, "code": "000000"}
+                    ),
+                )
+
+                response = await check(
+                    "POST /auth/login/",
+                    client.post(
+                        "/auth/login/", data={"username": email, "password": "password"}
+                    ),
+                )
+                tokens = response.json()
+                headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+                await check("GET /users/me/", client.get("/users/me/", headers=headers))
+                await check(
+                    "POST /auth/refresh/",
+                    client.post(
+                        "/auth/refresh/",
+                        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+                    ),
+                )
+                await check("GET /users/", client.get("/users/"))
+                await check(
+                    "POST /auth/logout/", client.post("/auth/logout/", headers=headers)
+                )
+            finally:
+                await check(
+                    "DELETE /users/delete/{id}", client.delete(f"/users/delete/{user_id}")
+                )
+    except AssertionError:
+        return 1
+    finally:
+        await shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
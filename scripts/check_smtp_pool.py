@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# Проверка пула SMTP соединений (`SMTPPool` из src/utils/emails.py).
+#
+# Поднимает локальный SMTP-сервер aiosmtpd с неявным TLS (самоподписанный сертификат)
+# и обязательным AUTH и проверяет, что:
+#   - параллельные отправки используют не больше `max_size` соединений
+#   - после закрытия соединений сервером письмо отправляется через новое соединение
+#   - keepalive сохраняет свежие соединения и закрывает простоявшие дольше idle_timeout
+# Печатает скорость отправки через пул и с новым соединением на каждое письмо.
+# При ошибке завершается с кодом 1.
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run --with aiosmtpd scripts/check_smtp_pool.py --messages 200
+
+import os
+import ssl
+import sys
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import datetime
+import tempfile
+import warnings
+from email.message import EmailMessage
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import aiosmtplib
+from cryptography import x509
+from aiosmtpd.smtp import AuthResult
+from aiosmtpd.controller import Controller
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from src.utils.emails import SMTPPool
+
+# предупреждения и журнал тестового сервера не относятся к проверке
+warnings.filterwarnings("ignore", module="aiosmtpd")
+logging.getLogger("mail.log").setLevel(logging.CRITICAL)
+
+HOST = "127.0.0.1"
+USERNAME = "sender@example.com"
+PASSWORD = "password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def make_ssl_context(directory: str) -> ssl.SSLContext:
+    """Самоподписанный сертификат для localhost"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+class Handler:
+    """Считает письма и успешные AUTH (по одному на соединение)"""
+
+    def __init__(self):
+        self.messages = 0
+        self.logins = 0
+
+    # имя метода-обработчика задает aiosmtpd
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.messages += 1
+        return "250 OK"
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        ok = auth_data.login.decode() == USERNAME and auth_data.password.decode() == PASSWORD
+        self.logins += ok
+        return AuthResult(success=ok)
+
+
+def make_message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = USERNAME
+    message["To"] = f"user{number}@example.com"
+    message["Subject"] = f"Проверка {number}"
+    message.set_content(f"Код: {number:06d}")
+    return message
+
+
+def report(name: str, passed: bool, details: str) -> bool:
+    print(f"{'ok  ' if passed else 'FAIL'} {name}: {details}")
+    return passed
+
+
+def start_server(handler: Handler, port: int, ssl_context: ssl.SSLContext) -> Controller:
+    controller = Controller(
+        handler,
+        hostname=HOST,
+        port=port,
+        ssl_context=ssl_context,
+        authenticator=handler.authenticate,
+        auth_required=True,
+        # aiosmtpd учитывает только STARTTLS, соединение и так зашифровано
+        auth_require_tls=False,
+    )
+    controller.start()
+    return controller
+
+
+async def main(messages: int, max_size: int) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        handler = Handler()
+        ssl_context = make_ssl_context(directory)
+        controller = start_server(handler, free_port(), ssl_context)
+        smtp_kwargs = dict(
+            hostname=HOST,
+            port=controller.port,
+            username=USERNAME,
+            password=PASSWORD,
+            use_tls=True,
+            validate_certs=False,
+            timeout=5,
+        )
+        pool = SMTPPool(
+            max_size=max_size, idle_timeout=300, keepalive_interval=60, **smtp_kwargs
+        )
+        results = []
+
+        try:
+            # новое соединение (TCP, TLS, AUTH) на каждое письмо - как было раньше
+            started = time.perf_counter()
+            for number in range(messages):
+                async with aiosmtplib.SMTP(**smtp_kwargs) as client:
+                    await client.send_message(make_message(number))
+            per_message = time.perf_counter() - started
+
+            logins_before = handler.logins
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(pool.send_message(make_message(number)) for number in range(messages))
+            )
+            pooled = time.perf_counter() - started
+            print(
+                f"     {messages} писем: соединение на письмо {messages / per_message:.0f}/s, "
+                f"пул {messages / pooled:.0f}/s ({per_message / pooled:.1f}x)"
+            )
+            results.append(
+                report(
+                    "pool size",
+                    pool.connects <= max_size and handler.logins - logins_before == pool.connects,
+                    f"{pool.connects} соединений на {messages} писем (max_size {max_size})",
+                )
+            )
+
+            # сервер закрывает все соединения: отправка переподключается сама
+            controller.stop()
+            controller = start_server(handler, controller.port, ssl_context)
+            connects = pool.connects
+            await pool.send_message(make_message(messages))
+            results.append(
+                report(
+                    "reconnect",
+                    pool.connects == connects + 1,
+                    "письмо отправлено через новое соединение после перезапуска сервера",
+                )
+            )
+
+            # оборванные перезапуском сервера соединения keepalive закрывает,
+            # живые проверяет NOOP и сохраняет
+            await pool.keepalive()
+            idle, connects = len(pool._idle), pool.connects
+            await pool.keepalive()
+            await pool.send_message(make_message(messages + 1))
+            results.append(
+                report(
+                    "keepalive",
+                    idle > 0 and len(pool._idle) == idle and pool.connects == connects,
+                    f"{idle} соединений проверены NOOP и переиспользуются",
+                )
+            )
+
+            # простоявшие дольше idle_timeout закрываются
+            pool.idle_timeout = 0.1
+            await asyncio.sleep(0.2)
+            await pool.keepalive()
+            results.append(
+                report(
+                    "idle timeout",
+                    not pool._idle,
+                    "соединения, простоявшие дольше idle_timeout, закрыты",
+                )
+            )
+
+            sent = 2 * messages + 2
+            results.append(
+                report(
+                    "delivered",
+                    handler.messages == sent,
+                    f"сервер получил {handler.messages}/{sent} писем",
+                )
+            )
+        finally:
+            await pool.close()
+            controller.stop()
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--max-size", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args.messages, args.max_size)))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Массовый импорт и экспорт пользователей через COPY (src/database/bulk_users.py).
+#
+# Импорт принимает CSV с заголовком или NDJSON с полями email, password (готовый
+# bcrypt-хэш), необязательными username, role, status. Пользователи с занятыми
+# email или username пропускаются, некорректные строки попадают в отчет.
+# Экспорт выгружает всех пользователей с хэшами паролей в формате, совместимом с импортом.
+#
+# Запуск из корня репозитория (нужен .env):
+#   uv run scripts/users_bulk.py export users.ndjson
+#   uv run scripts/users_bulk.py import users.csv --format csv --batch-size 20000
+#   uv run scripts/users_bulk.py export - --format csv | gzip > users.csv.gz
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import AsyncIterator
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.database import database, bulk_users
+from src.schemas.users import UsersImportReport
+
+
+async def read_lines(path: str) -> AsyncIterator[str]:
+    file = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in file:
+            yield line.rstrip("\r\n")
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+async def run_import(args) -> int:
+    started = time.perf_counter()
+
+    def print_progress(report: UsersImportReport) -> None:
+        elapsed = time.perf_counter() - started
+        print(
+            f"\r{report.received} строк, вставлено {report.inserted}, "
+            f"пропущено {report.skipped}, ошибок {report.invalid} "
+            f"({report.received / elapsed:.0f} строк/с)",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    report = await bulk_users.import_users(
+        lines=read_lines(args.path),
+        fmt=detect_format(args.path, args.format),
+        batch_size=args.batch_size,
+        on_progress=print_progress,
+    )
+    print(file=sys.stderr)
+    print(report.model_dump_json(indent=4))
+    return 1 if report.invalid else 0
+
+
+async def run_export(args) -> int:
+    output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    written = 0
+    started = time.perf_counter()
+    try:
+        async for chunk in bulk_users.export_users(fmt=detect_format(args.path, args.format)):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(
+        f"Выгружено {written / 1024 / 1024:.1f} МБ за {time.perf_counter() - started:.1f} с",
+        file=sys.stderr,
+    )
+    return 0
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Массовый импорт и экспорт пользователей")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Импорт из файла ('-' - stdin)")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    export_parser = subparsers.add_parser("export", help="Экспорт в файл ('-' - stdout)")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=["csv", "ndjson"])
+
+    args = parser.parse_args()
+    try:
+        if args.command == "import":
+            return await run_import(args)
+        return await run_export(args)
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
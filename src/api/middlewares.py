@@ -0,0 +1,38 @@
+from fastapi import Request
+
+from src.config import settings
+from src.database.query_stats import count_queries
+
+
+async def db_stats_middleware(request: Request, call_next):
+    """
+    Считает запросы к БД и их суммарное время в пределах HTTP-запроса.
+
+    - пишет в лог запросы, в которых одна форма SQL повторяется не меньше
+      `METRICS_REPEATED_STATEMENT_THRESHOLD` раз (подозрение на N+1)
+      или запросов больше `METRICS_MAX_QUERIES_PER_REQUEST`
+    - при `METRICS_LOG_QUERIES` пишет в лог сводку каждого запроса
+    - в режиме отладки (`METRICS_DEBUG`) добавляет в ответ заголовок `X-DB-Summary`
+
+    Для потоковых ответов учитываются только запросы до начала отправки тела.
+    """
+    with count_queries() as stats:
+        response = await call_next(request)
+
+    endpoint = f"{request.method} {request.url.path}"
+
+    if settings.metrics.log_queries:
+        print(f"DB {endpoint}: {stats.header()}")
+
+    if stats.queries > settings.metrics.max_queries_per_request:
+        print(
+            f"Too many DB queries in {endpoint}: {stats.queries} "
+            f"(limit {settings.metrics.max_queries_per_request})"
+        )
+
+    for shape, count in stats.repeated(settings.metrics.repeated_statement_threshold):
+        print(f"Possible N+1 in {endpoint}: {count}x {shape}")
+
+    if settings.metrics.debug:
+        response.headers["X-DB-Summary"] = stats.header()
+    return response
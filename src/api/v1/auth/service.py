@@ -6,10 +6,15 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import database
-from src.entities import UserStatus
+from src.entities import UserRole, UserStatus
 from src.security import tokens, hashing_encoding
-from src.database.crud import users, blacklisted_tokens
-from src.database.tables import User
+from src.database.crud import users
+from src.schemas.users import UserSnapshot
+from src.database.user_cache import user_cache
+from src.security.revocation import revocation_store
+from src.tasks.device_activity import device_activity
+from src.security.payload_cache import payload_cache
+from src.security.password_hasher import HashingQueueFullError, password_hasher
 
 http_bearer = HTTPBearer()
 
@@ -18,19 +23,29 @@ async def get_login_credentials(
     session: Annotated[AsyncSession, Depends(database.session_getter)],
     username: str = Form(),
     password: str = Form(),
-) -> User:
+) -> users.UserCredentials:
     """
     Создает форму `x-www-form-urlencode`.
     """
     unauthorized_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверные учетные данные"
     )
-    if not (user := await users.get_user(session=session, email=username)):
+    if not (user := await users.get_user_credentials(session=session, email=username)):
         raise unauthorized_exc
 
-    if not hashing_encoding.verify_password(
-        password=password, hashed_password=user.password
-    ):
+    try:
+        # bcrypt выполняется в пуле воркеров и не блокирует event loop
+        is_valid = await password_hasher.verify_password(
+            password=password, hashed_password=user.password
+        )
+    except HashingQueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+
+    if not is_valid:
         raise unauthorized_exc
 
     if user.status != UserStatus.ACTIVATED:
@@ -42,13 +57,16 @@ async def get_login_credentials(
 
 
 async def get_payload_from_token(
+    session: Annotated[AsyncSession, Depends(database.session_getter)],
     http_creds: HTTPAuthorizationCredentials = Depends(http_bearer),
 ) -> dict:
     """
     Получает текущего авторизованного пользователя из токена в заголовке `Authorization`.
-    Проверяет, что токен не находится в черном списке.
+    Проверяет, что токен не находится в черном списке
+    и выпущен после последнего выхода пользователя со всех устройств.
 
     Args:
+        - `session`: сессия запроса (общая для всех зависимостей)
         - `http_creds`: заголовок Authorization в формате `Bearer <token>`
 
     Raises:
@@ -63,8 +81,9 @@ async def get_payload_from_token(
 
     try:
         # pyJWT самостоятельно проверит время жизни токена
-        # и выбросит исключение, если токен просрочен
-        payload: dict = hashing_encoding.decode_jwt(token=token)
+        # и выбросит исключение, если токен просрочен;
+        # подпись проверяется один раз, далее payload берется из кэша до `exp`
+        payload: dict = payload_cache.decode(token=token)
     except InvalidTokenError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -73,54 +92,67 @@ async def get_payload_from_token(
 
     # Проверяем, не находится ли токен в черном списке
     jti = payload.get(tokens.TOKEN_ID_FIELD)
-    if jti:
-        async with database.session_factory() as session:
-            if await blacklisted_tokens.is_token_blacklisted(session=session, jti=jti):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Токен деактивирован",
-                )
+    if jti and await revocation_store.is_revoked(jti, session=session):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен деактивирован"
+        )
+
+    # Проверяем, не выполнен ли выход со всех устройств после выпуска токена
+    if await revocation_store.is_issued_before_revocation(
+        subject=payload.get(tokens.TOKEN_SUBJECT_FIELD),
+        issued_at=payload.get("iat", 0),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен деактивирован"
+        )
 
     return payload
 
 
-async def get_user_from_payload(payload: dict) -> User | None:
+async def get_user_from_payload(
+    payload: dict, session: AsyncSession
+) -> UserSnapshot | None:
     """
-    Получает пользователя из БД по email из payload токена.
+    Получает снимок пользователя по email из payload токена.
+    Сначала ищет в кэше пользователей, при промахе - в БД.
     Проверяет, что пользователь активирован.
 
     Args:
         - `payload`: payload токена.
+        - `session`: сессия запроса (общая для всех зависимостей)
 
     Raises:
         - `HTTPException`: если пользователь не найден или не активирован.
 
     Returns:
-        `User`: текущий авторизованный пользователь.
+        `UserSnapshot`: текущий авторизованный пользователь.
     """
 
     # получаем email из payload
     subject: str | None = payload.get("sub")
 
-    async with database.session_factory() as session:
+    if (user := await user_cache.get(subject)) is None:
         # получаем пользователя из БД
-        if not (user := await users.get_user(session=session, email=subject)):
+        if not (user := await users.get_user_snapshot(session=session, email=subject)):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Пользователь не найден",
             )
-        # проверяем, что пользователь активирован
-        if user.status != UserStatus.ACTIVATED:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь не активен"
-            )
+        await user_cache.set(user)
+
+    # проверяем, что пользователь активирован
+    if user.status != UserStatus.ACTIVATED:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь не активен"
+        )
 
     return user
 
 
 async def get_current_auth_user_for_access(
-    payload: dict = Depends(get_payload_from_token),
-) -> User | None:
+    payload: Annotated[dict, Depends(get_payload_from_token)],
+    session: Annotated[AsyncSession, Depends(database.session_getter)],
+) -> UserSnapshot | None:
     """
     Получает текущего авторизованного пользователя из токена в заголовке `Authorization`.
     Проверяет, что токен имеет тип "access".
@@ -130,16 +162,53 @@ async def get_current_auth_user_for_access(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный тип токена"
         )
-    return await get_user_from_payload(payload)
+    user = await get_user_from_payload(payload=payload, session=session)
+
+    # только отметка в памяти, в БД пишет фоновая задача
+    device_activity.touch(
+        device_id=payload.get(tokens.TOKEN_DEVICE_FIELD),
+        session_id=payload.get(tokens.TOKEN_SESSION_FIELD),
+    )
+    return user
 
 
-async def get_current_auth_user_for_refresh(
-    payload: dict = Depends(get_payload_from_token),
-) -> User | None:
+async def get_current_admin_user(
+    user: Annotated[UserSnapshot | None, Depends(get_current_auth_user_for_access)],
+) -> UserSnapshot:
     """
-    Получает текущего авторизованного пользователя из токена в заголовке `Authorization`.
-    Проверяет, что токен имеет тип "refresh".
+    Получает текущего авторизованного пользователя и проверяет, что он администратор.
     """
+    if user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав"
+        )
+    return user
+
+
+async def get_payload_from_refresh_token(
+    http_creds: HTTPAuthorizationCredentials = Depends(http_bearer),
+) -> dict:
+    """
+    Получает payload refresh токена из заголовка `Authorization`.
+    Проверяет подпись, тип токена и отметку выхода со всех устройств.
+    Не обращается к БД: актуальность токена проверяется по его семейству в Redis.
+
+    Raises:
+        - `HTTPException`: если токен недействителен, имеет неверный тип
+          или не принадлежит семейству.
+
+    Returns:
+        `dict`: payload токена.
+    """
+    try:
+        # refresh токен используется один раз, поэтому кэш payload не нужен
+        payload: dict = hashing_encoding.decode_jwt(token=http_creds.credentials)
+    except InvalidTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Ошибка декодирования токена: {e}",
+        )
+
     # проверяем, что токен имеет тип "refresh"
     if (
         payload.get(tokens.TOKEN_TYPE_FIELD)
@@ -148,4 +217,22 @@ async def get_current_auth_user_for_refresh(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный тип токена"
         )
-    return await get_user_from_payload(payload)
+
+    # токены, выпущенные до появления семейств, обновить нельзя
+    if not payload.get(tokens.TOKEN_FAMILY_FIELD) or not payload.get(
+        tokens.TOKEN_ID_FIELD
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Токен устарел, выполните вход заново",
+        )
+
+    if await revocation_store.is_issued_before_revocation(
+        subject=payload.get(tokens.TOKEN_SUBJECT_FIELD),
+        issued_at=payload.get("iat", 0),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен деактивирован"
+        )
+
+    return payload
@@ -1,58 +1,189 @@
+import time
+import uuid
 from typing import Annotated
 
-from fastapi import Depends, APIRouter, HTTPException, status
+from fastapi import Header, Depends, Request, Response, APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import src.security.tokens as tokens
 import src.api.v1.auth.service as service
+from src.config import settings
 from src.database import database
 from src.schemas.auth import TokenInfo
-from src.database.crud import blacklisted_tokens
-from src.database.tables import User
+from src.database.crud import users, devices, blacklisted_tokens
+from src.schemas.users import UserSnapshot
+from src.security.keys import keyring
+from src.security.rate_limit import RateLimit, client_ip, form_field
+from src.security.revocation import revocation_store
+from src.tasks.device_activity import device_activity
+from src.security.refresh_tokens import RotationStatus, refresh_token_families
 
 router = APIRouter(tags=["Авторизация"])
 
+# проверяются до bcrypt: по IP-адресу и по атакуемому аккаунту
+login_rate_limits = [
+    Depends(
+        RateLimit(
+            scope="login:ip",
+            limit=settings.rate_limit.login_per_ip,
+            period=settings.rate_limit.login_period,
+            key=client_ip,
+        )
+    ),
+    Depends(
+        RateLimit(
+            scope="login:email",
+            limit=settings.rate_limit.login_per_email,
+            period=settings.rate_limit.login_period,
+            key=form_field("username"),
+        )
+    ),
+]
+
 
-@router.post("/login/", response_model=TokenInfo)
-async def login(user: Annotated[User, Depends(service.get_login_credentials)]):
+def create_token_pair(
+    user: UserSnapshot,
+    family_id: str,
+    refresh_jti: str,
+    device_id: str | None = None,
+    session_id: str | None = None,
+) -> TokenInfo:
+    """Создает пару access/refresh токенов одного семейства и одной сессии устройства"""
+    device_claims = {"device_id": device_id, "session_id": session_id}
     access_token = tokens.create_token(
-        user=user, token_type=tokens.TokenType.ACCESS_TOKEN_TYPE
+        user=user,
+        token_type=tokens.TokenType.ACCESS_TOKEN_TYPE,
+        family_id=family_id,
+        **device_claims,
     )
     refresh_token = tokens.create_token(
-        user=user, token_type=tokens.TokenType.REFRESH_TOKEN_TYPE
+        user=user,
+        token_type=tokens.TokenType.REFRESH_TOKEN_TYPE,
+        jti=refresh_jti,
+        family_id=family_id,
+        **device_claims,
     )
 
-    return TokenInfo(access_token=access_token, refresh_token=refresh_token)
+    return TokenInfo(
+        access_token=access_token, refresh_token=refresh_token, device_id=device_id
+    )
 
 
-@router.post("/refresh/", response_model=TokenInfo)
-async def refresh_token(
-    user: Annotated[User | None, Depends(service.get_current_auth_user_for_refresh)],
+def parse_device_id(value: str | None) -> uuid.UUID | None:
+    """Некорректный ID устройства не ошибка: будет зарегистрировано новое устройство"""
+    try:
+        return uuid.UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+@router.post("/login/", response_model=TokenInfo, dependencies=login_rate_limits)
+async def login(
+    request: Request,
+    user: Annotated[users.UserCredentials, Depends(service.get_login_credentials)],
+    session: Annotated[AsyncSession, Depends(database.session_getter)],
+    x_device_id: Annotated[str | None, Header()] = None,
 ):
-    if not user:
+    """
+    Вход по email и паролю. Каждый вход создает сессию устройства;
+    ID устройства из ответа клиент передает в заголовке `X-Device-Id` при следующих входах.
+    """
+    snapshot = UserSnapshot.model_validate(user)
+    family_id = refresh_token_families.new_id()
+    refresh_jti = refresh_token_families.new_id()
+
+    try:
+        # каждый вход начинает новое семейство refresh токенов.
+        # Семейство создается до сессии устройства: если Redis недоступен, в БД
+        # не остается сессии без токенов, а семейство без сессии истечет по TTL
+        await refresh_token_families.start(
+            user=snapshot, family_id=family_id, jti=refresh_jti
+        )
+    except Exception as e:
+        print(f"Redis error: {e}")
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный тип токена"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис временно недоступен",
         )
 
-    access_token = tokens.create_token(
-        user=user, token_type=tokens.TokenType.ACCESS_TOKEN_TYPE
+    device_id, session_id = await devices.start_device_session(
+        session=session,
+        user_id=user.id,
+        device_id=parse_device_id(x_device_id),
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
     )
-    refresh_token = tokens.create_token(
-        user=user, token_type=tokens.TokenType.REFRESH_TOKEN_TYPE
+
+    return create_token_pair(
+        user=snapshot,
+        family_id=family_id,
+        refresh_jti=refresh_jti,
+        device_id=str(device_id),
+        session_id=str(session_id),
     )
 
-    return TokenInfo(access_token=access_token, refresh_token=refresh_token)
+
+@router.post("/refresh/", response_model=TokenInfo)
+async def refresh_token(
+    payload: Annotated[dict, Depends(service.get_payload_from_refresh_token)],
+):
+    """
+    Обновление пары токенов. Предъявленный refresh токен становится недействительным.
+    Повторное предъявление уже использованного токена отзывает все семейство.
+    """
+    family_id = payload[tokens.TOKEN_FAMILY_FIELD]
+    refresh_jti = refresh_token_families.new_id()
+
+    try:
+        rotation_status, user = await refresh_token_families.rotate(
+            email=payload.get(tokens.TOKEN_SUBJECT_FIELD),
+            family_id=family_id,
+            jti=payload[tokens.TOKEN_ID_FIELD],
+            new_jti=refresh_jti,
+        )
+    except Exception as e:
+        print(f"Redis error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис временно недоступен",
+        )
+
+    match rotation_status:
+        case RotationStatus.REUSED:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Токен уже использован, выполните вход заново",
+            )
+        case RotationStatus.NOT_FOUND:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Токен деактивирован"
+            )
+
+    device_id = payload.get(tokens.TOKEN_DEVICE_FIELD)
+    session_id = payload.get(tokens.TOKEN_SESSION_FIELD)
+    device_activity.touch(device_id=device_id, session_id=session_id)
+
+    return create_token_pair(
+        user=user,
+        family_id=family_id,
+        refresh_jti=refresh_jti,
+        device_id=device_id,
+        session_id=session_id,
+    )
 
 
 @router.post("/logout/")
 async def logout(
-    user: Annotated[User | None, Depends(service.get_current_auth_user_for_access)],
+    user: Annotated[
+        UserSnapshot | None, Depends(service.get_current_auth_user_for_access)
+    ],
     payload: Annotated[dict, Depends(service.get_payload_from_token)],
     session: Annotated[AsyncSession, Depends(database.session_getter)],
 ):
     """
-    Выход из системы - деактивация текущего access токена.
-    После этого токен становится недействительным.
+    Выход из системы - деактивация текущего access токена и семейства refresh токенов.
+    После этого токены становятся недействительными.
     """
     if not user:
         raise HTTPException(
@@ -79,8 +210,7 @@ async def logout(
         )
 
     try:
-        # очищаем любые истекшие токены из БД
-        await blacklisted_tokens.cleanup_expired_tokens(session=session)
+        # истекшие токены удаляет фоновая задача (src/tasks/blacklist_reaper.py)
         # добавляем токен в черный список
         await blacklisted_tokens.add_to_blacklist(
             session=session,
@@ -89,6 +219,11 @@ async def logout(
             user_id=user.id,
             expires_at=expires_at,
         )
+        # отзываем токен в Redis и локальных фильтрах всех реплик
+        await revocation_store.revoke(jti=jti, expires_at=int(expires_at.timestamp()))
+        # refresh токены этого входа больше не обновляются
+        if family_id := payload.get(tokens.TOKEN_FAMILY_FIELD):
+            await refresh_token_families.revoke(email=user.email, family_id=family_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -102,6 +237,60 @@ async def logout(
     }
 
 
+@router.post("/logout-all/")
+async def logout_all(
+    user: Annotated[
+        UserSnapshot | None, Depends(service.get_current_auth_user_for_access)
+    ],
+    session: Annotated[AsyncSession, Depends(database.session_getter)],
+):
+    """
+    Выход со всех устройств - деактивация всех выпущенных токенов пользователя.
+    Токены не перечисляются: сохраняется отметка времени, и все токены,
+    выпущенные раньше нее, считаются недействительными.
+    """
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный тип токена"
+        )
+
+    # `iat` хранится с точностью до секунды, поэтому отметка ставится на следующую
+    # секунду: токены, выпущенные в ту же секунду до выхода, тоже будут отозваны
+    not_before = int(time.time()) + 1
+
+    try:
+        await users.set_tokens_not_before(
+            session=session, user_id=user.id, not_before=not_before
+        )
+        await revocation_store.revoke_all(subject=user.email, not_before=not_before)
+        await refresh_token_families.revoke_all(email=user.email)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Ошибка при деактивации токенов: {e}",
+        )
+
+    return {
+        "message": "Выход со всех устройств выполнен успешно",
+        "user_email": user.email,
+        "tokens_not_before": not_before,
+    }
+
+
+@router.get("/jwks/")
+async def get_jwks(request: Request):
+    """
+    Публичные ключи проверки JWT в формате JWKS.
+    Ответ кэшируется клиентами и прокси по ETag.
+    """
+    headers = {"ETag": keyring.jwks_etag, "Cache-Control": "public, max-age=300"}
+
+    if request.headers.get("if-none-match") == keyring.jwks_etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return ORJSONResponse(content=keyring.jwks, headers=headers)
+
+
 # @router.post("/test_access_token/")
 # async def test_access_token(
 #     user: Annotated[User | None, Depends(service.get_current_auth_user_for_access)],
@@ -0,0 +1,41 @@
+from fastapi import Depends, APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.api.v1.auth import service as auth_service
+from src.database.metrics import db_metrics
+from src.security.payload_cache import payload_cache
+from src.security.password_hasher import password_hasher
+
+# имена CRUD-функций, состояние пула и задержки запросов - только для администраторов
+router = APIRouter(
+    tags=["Метрики"], dependencies=[Depends(auth_service.get_current_admin_user)]
+)
+
+
+@router.get("/", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Метрики пула соединений и запросов к БД, пула хэширования паролей
+    и кэша JWT payload в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(
+        db_metrics.render_prometheus()
+        + password_hasher.metrics.render_prometheus(password_hasher.in_flight)
+        + payload_cache.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/json/")
+async def get_metrics_json() -> dict:
+    """
+    Те же метрики в JSON - для ручного просмотра.
+    """
+    return {
+        **db_metrics.snapshot(),
+        "password_hashing": {
+            **password_hasher.metrics.snapshot(),
+            "in_flight": password_hasher.in_flight,
+        },
+        "jwt_payload_cache": payload_cache.stats(),
+    }
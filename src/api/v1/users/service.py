@@ -1,8 +1,9 @@
 import random
 import string
 
-from src.utils.emails import send_verification_code
-from src.utils.redis_client import redis_client
+from src.config import settings
+from src.tasks.email_outbox import email_outbox
+from src.utils.redis_client import VerificationResult, redis_client
 
 
 def generate_verification_code():
@@ -12,13 +13,14 @@ def generate_verification_code():
 
 async def send_verification_email(email: str) -> bool:
     """
-    Генерирует код верификации, сохраняет в Redis и отправляет на email
+    Генерирует код верификации, сохраняет в Redis и ставит письмо с ним в очередь
+    (отправляет воркер `src/tasks/email_outbox.py`)
 
     Args:
         email: Email пользователя
 
     Returns:
-        bool: True если код успешно отправлен
+        bool: True если код сохранен и письмо поставлено в очередь
     """
     # Генерируем код
     code = generate_verification_code()
@@ -28,29 +30,25 @@ async def send_verification_email(email: str) -> bool:
     if not saved:
         return False
 
-    # Отправляем email
-    email_sent = await send_verification_code(email, code)
-    return email_sent
+    # Ставим письмо в очередь; после истечения кода письмо не отправляется
+    message_id = await email_outbox.enqueue(
+        kind="verification",
+        to=email,
+        data={"code": code},
+        ttl=settings.redis.verification_code_ttl,
+    )
+    return message_id is not None
 
 
-async def verify_email_code(email: str, code: str) -> bool:
+async def verify_email_code(email: str, code: str) -> VerificationResult:
     """
-    Проверяет код верификации для email
+    Проверяет код верификации для email (атомарно, см. `RedisClient.check_verification_code`)
 
     Args:
         email: Email пользователя
         code: Код верификации
 
     Returns:
-        bool: True если код верный
+        VerificationResult: результат проверки и количество оставшихся попыток
     """
-    stored_code = await redis_client.get_verification_code(email)
-    if not stored_code:
-        return False
-
-    if stored_code == code:
-        # Удаляем использованный код
-        await redis_client.delete_verification_code(email)
-        return True
-
-    return False
+    return await redis_client.check_verification_code(email, code)
@@ -1,7 +1,8 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 
-from fastapi import Depends, APIRouter
-from sqlalchemy.exc import IntegrityError
+import orjson
+from fastapi import Query, Depends, Request, APIRouter
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import src.schemas.users as scheme
@@ -10,25 +11,68 @@ import src.database.crud.users as crud
 import src.api.v1.users.service as service
 import src.exceptions.error_codes as error_code
 from src.config import settings
-from src.database import database
+from src.database import database, bulk_users
+from src.entities import UserStatus
 from src.exceptions import CustomHTTPException
-from src.database.tables import User
-from src.security.hashing_encoding import hash_password
+from src.utils.redis_client import VerificationStatus
+from src.security.rate_limit import RateLimit, client_ip, body_field
+from src.security.password_hasher import HashingQueueFullError, password_hasher
 
 router = APIRouter(tags=["Пользователи"])
 
+USERS_PAGE_MAX_LIMIT = 1000
+USERS_STREAM_BATCH_SIZE = 1000
 
-@router.post("/create/")
+# проверяются до хеширования пароля и отправки письма
+create_rate_limits = [
+    Depends(
+        RateLimit(
+            scope="create:ip",
+            limit=settings.rate_limit.create_per_ip,
+            period=settings.rate_limit.create_period,
+            key=client_ip,
+        )
+    ),
+]
+verification_rate_limits = [
+    Depends(
+        RateLimit(
+            scope="verification:ip",
+            limit=settings.rate_limit.verification_per_ip,
+            period=settings.rate_limit.verification_period,
+            key=client_ip,
+        )
+    ),
+    Depends(
+        RateLimit(
+            scope="verification:user",
+            limit=settings.rate_limit.verification_per_user,
+            period=settings.rate_limit.verification_period,
+            key=body_field("id"),
+        )
+    ),
+]
+
+
+@router.post("/create/", dependencies=create_rate_limits)
 async def create_new_user(
     user: scheme.UserCreateIn,
     session: Annotated[AsyncSession, Depends(database.session_getter)],
 ) -> scheme.UserCreateOut:
-    # хешируем сырой пароль
-    user.password = hash_password(user.password).decode()
-    # создаем юзера в БД
+    # хешируем сырой пароль в пуле воркеров
     try:
-        user = await crud.create_user(session=session, user_create=user)
-    except IntegrityError:
+        user.password = (await password_hasher.hash_password(user.password)).decode()
+    except HashingQueueFullError:
+        raise CustomHTTPException(
+            error_code.SERVER_BUSY,
+            scheme.UserCreateOut(
+                created=False, message="Сервер перегружен, повторите попытку позже"
+            ),
+            headers={"Retry-After": "1"},
+        )
+    # создаем юзера в БД; занятый email - это None, а не IntegrityError
+    user_id = await crud.create_user(session=session, user_create=user)
+    if user_id is None:
         raise CustomHTTPException(
             error_code.USER_ALREADY_EXISTS,
             scheme.UserCreateOut(
@@ -36,12 +80,12 @@ async def create_new_user(
             ),
         )
 
-    # возвращаем созданного юзера
-    user.created = True
-    return user
+    return scheme.UserCreateOut(
+        id=user_id, created=True, message="Пользователь успешно создан"
+    )
 
 
-@router.post("/send-verification/")
+@router.post("/send-verification/", dependencies=verification_rate_limits)
 async def send_verification_email(
     email_data: scheme.EmailVerificationIn,
     session: Annotated[AsyncSession, Depends(database.session_getter)],
@@ -49,16 +93,19 @@ async def send_verification_email(
     """
     Отправляет код верификации на email
     """
-    # проверяем, существует ли пользователь
-    if not (user := await crud.get_user(session=session, user_id=email_data.id)):
+    # проверяем, существует ли пользователь (статус и email - одним запросом)
+    if not (
+        user := await crud.get_user_status_and_email(
+            session=session, user_id=email_data.id
+        )
+    ):
         raise CustomHTTPException(
             error_code.USER_NOT_FOUND,
             scheme.EmailVerificationOut(sent=False, message="Пользователь не найден"),
         )
 
     # проверяем, верифицирован ли email
-    is_verified = await crud.is_user_email_verified(session, email_data.id)
-    if is_verified:
+    if user.status == UserStatus.ACTIVATED:
         raise CustomHTTPException(
             error_code.EMAIL_ALREADY_VERIFIED,
             scheme.EmailVerificationOut(sent=False, message="Email уже верифицирован"),
@@ -89,16 +136,42 @@ async def verify_email_code(
     """
     Проверяет код верификации и обновляет статус пользователя
     """
-    # Проверяем код
-    code_valid = await service.verify_email_code(verify_data.email, verify_data.code)
+    # Проверяем код; верный код удаляется, повторно его использовать нельзя
+    result = await service.verify_email_code(verify_data.email, verify_data.code)
 
-    if not code_valid:
-        raise CustomHTTPException(
-            error_code.INCORRECT_VERIFICATION_CODE,
-            scheme.VerifyCodeOut(
-                verified=False, message="Неверный код верификации или код истек"
-            ),
-        )
+    match result.status:
+        case VerificationStatus.UNAVAILABLE:
+            raise CustomHTTPException(
+                error_code.SERVER_BUSY,
+                scheme.VerifyCodeOut(
+                    verified=False, message="Сервис временно недоступен"
+                ),
+            )
+        case VerificationStatus.ATTEMPTS_EXCEEDED:
+            raise CustomHTTPException(
+                error_code.VERIFICATION_ATTEMPTS_EXCEEDED,
+                scheme.VerifyCodeOut(
+                    verified=False,
+                    message="Превышено количество попыток, запросите новый код",
+                    attempts_left=0,
+                ),
+            )
+        case VerificationStatus.INVALID:
+            raise CustomHTTPException(
+                error_code.INCORRECT_VERIFICATION_CODE,
+                scheme.VerifyCodeOut(
+                    verified=False,
+                    message="Неверный код верификации",
+                    attempts_left=result.attempts_left,
+                ),
+            )
+        case VerificationStatus.NOT_FOUND:
+            raise CustomHTTPException(
+                error_code.INCORRECT_VERIFICATION_CODE,
+                scheme.VerifyCodeOut(
+                    verified=False, message="Неверный код верификации или код истек"
+                ),
+            )
 
     # Обновляем статус в базе данных
     updated = await crud.verify_user_email(session, verify_data.email)
@@ -114,18 +187,101 @@ async def verify_email_code(
     return scheme.VerifyCodeOut(verified=True, message="Email успешно подтвержден")
 
 
-@router.get("/")
+@router.get("/", response_model=list[scheme.UserRead])
 async def get_all_users(
-    session: Annotated[AsyncSession, Depends(database.session_getter)],
-) -> list[scheme.UserRead]:
-    users = await crud.get_all_users(session=session)
-    return users
+    session: Annotated[AsyncSession, Depends(database.read_session_getter)],
+    after_id: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=USERS_PAGE_MAX_LIMIT)] = 100,
+):
+    """
+    Страница пользователей, упорядоченных по id.
+    Для следующей страницы передайте `after_id` из заголовка `X-Next-After-Id`;
+    если заголовка нет - страница последняя.
+    """
+    rows = await crud.get_users_page(session=session, after_id=after_id, limit=limit)
+
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-After-Id"] = str(rows[-1].id)
+
+    # строки уже содержат только публичные поля - отдаем их без валидации моделью
+    return ORJSONResponse(
+        content=[{"id": user_id, "email": email} for user_id, email in rows],
+        headers=headers,
+    )
+
+
+async def _encode_users_ndjson(after_id: int) -> AsyncIterator[bytes]:
+    # сессия открывается в генераторе: зависимость закрывается до отправки тела
+    async with database.read_session_factory() as session:
+        async for rows in crud.stream_users(
+            session=session, after_id=after_id, batch_size=USERS_STREAM_BATCH_SIZE
+        ):
+            yield b"".join(
+                orjson.dumps({"id": user_id, "email": email}) + b"\n"
+                for user_id, email in rows
+            )
+
+
+@router.get("/stream/")
+async def stream_all_users(after_id: Annotated[int, Query(ge=0)] = 0):
+    """
+    Все пользователи в формате NDJSON (одна JSON-запись на строку).
+    Память сервера не зависит от количества пользователей.
+    """
+    return StreamingResponse(
+        _encode_users_ndjson(after_id=after_id), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/import/")
+async def import_users(
+    request: Request,
+    admin: Annotated[scheme.UserSnapshot, Depends(auth_service.get_current_admin_user)],
+    format: Annotated[bulk_users.ImportFormat, Query()] = "ndjson",
+    batch_size: Annotated[int, Query(ge=1, le=100_000)] = 10_000,
+) -> scheme.UsersImportReport:
+    """
+    Массовый импорт пользователей (только для администраторов).
+
+    Тело запроса - CSV с заголовком или NDJSON с полями `email`, `password`
+    (готовый bcrypt-хэш), необязательными `username`, `role`, `status`.
+    Тело читается потоково и загружается пачками через `COPY`.
+    Пользователи с занятыми email или username пропускаются.
+    """
+
+    def log_progress(report: scheme.UsersImportReport) -> None:
+        print(
+            f"Users import: received={report.received} inserted={report.inserted} "
+            f"skipped={report.skipped} invalid={report.invalid}"
+        )
+
+    return await bulk_users.import_users(
+        lines=bulk_users.iter_lines(request.stream()),
+        fmt=format,
+        batch_size=batch_size,
+        on_progress=log_progress,
+    )
+
+
+@router.get("/export/")
+async def export_users(
+    admin: Annotated[scheme.UserSnapshot, Depends(auth_service.get_current_admin_user)],
+    format: Annotated[bulk_users.ImportFormat, Query()] = "ndjson",
+):
+    """
+    Массовый экспорт пользователей с хэшами паролей (только для администраторов).
+    Выгрузка идет потоково через `COPY TO STDOUT`; формат совместим с импортом.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(bulk_users.export_users(fmt=format), media_type=media_type)
 
 
 @router.get("/me/")
 async def get_current_user(
     user: Annotated[
-        User | None, Depends(auth_service.get_current_auth_user_for_access)
+        scheme.UserSnapshot | None,
+        Depends(auth_service.get_current_auth_user_for_access),
     ],
 ) -> scheme.UserRead:
     return user
@@ -147,18 +303,6 @@ async def delete_user(
     """
     try:
         deleted = await crud.delete_user(session=session, user_id=user_id)
-        if not deleted:
-            raise CustomHTTPException(
-                error_code.USER_NOT_FOUND,
-                scheme.UserDeleteOut(
-                    deleted=False, message=f"Пользователь с ID {user_id} не найден"
-                ),
-            )
-
-        return scheme.UserDeleteOut(
-            deleted=True,
-            message=f"Пользователь {user_id} и все связанные данные успешно удалены",
-        )
     except Exception as e:
         # Логируем ошибку для отладки
         print(f"Error deleting user {user_id}: {e}")
@@ -168,3 +312,47 @@ async def delete_user(
                 deleted=False, message="Произошла ошибка при удалении пользователя"
             ),
         )
+
+    if not deleted:
+        raise CustomHTTPException(
+            error_code.USER_NOT_FOUND,
+            scheme.UserDeleteOut(
+                deleted=False, message=f"Пользователь с ID {user_id} не найден"
+            ),
+        )
+
+    return scheme.UserDeleteOut(
+        deleted=True,
+        message=f"Пользователь {user_id} и все связанные данные успешно удалены",
+    )
+
+
+@router.post("/delete-bulk/")
+async def delete_users(
+    data: scheme.UsersBulkDeleteIn,
+    admin: Annotated[scheme.UserSnapshot, Depends(auth_service.get_current_admin_user)],
+    session: Annotated[AsyncSession, Depends(database.session_getter)],
+) -> scheme.UsersBulkDeleteOut:
+    """
+    Удаляет пользователей по списку ID одним запросом (только для администраторов).
+    Связанные данные удаляет БД, в память приложения они не загружаются.
+    """
+    try:
+        deleted_ids = await crud.delete_users(session=session, user_ids=data.ids)
+    except Exception as e:
+        print(f"Error deleting users {data.ids}: {e}")
+        raise CustomHTTPException(
+            error_code.USER_DELETE_ERROR,
+            scheme.UsersBulkDeleteOut(
+                deleted_ids=[],
+                not_found_ids=[],
+                message="Произошла ошибка при удалении пользователей",
+            ),
+        )
+
+    not_found_ids = sorted(set(data.ids) - set(deleted_ids))
+    return scheme.UsersBulkDeleteOut(
+        deleted_ids=deleted_ids,
+        not_found_ids=not_found_ids,
+        message=f"Удалено пользователей: {len(deleted_ids)}",
+    )
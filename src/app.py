@@ -7,6 +7,15 @@ from src.api.v1 import main_router as api_v1_router
 from src.config import settings
 from src.database import database
 from src.exceptions import register_exception_handlers
+from src.utils.emails import smtp_pool
+from src.security.keys import keyring
+from src.api.middlewares import db_stats_middleware
+from src.tasks.email_outbox import email_outbox
+from src.utils.redis_client import redis_client
+from src.security.revocation import revocation_store
+from src.tasks.device_activity import device_activity
+from src.tasks.blacklist_reaper import blacklist_reaper
+from src.security.password_hasher import password_hasher
 
 
 async def startup():
@@ -17,9 +26,12 @@ async def startup():
     print("\nserver", f"\n{settings.server.model_dump_json(indent=4)}")
     print("\napp", f"\n{settings.app.model_dump_json(indent=4)}")
     print("\nsecurity", f"\n{settings.security.model_dump_json(indent=4)}")
+    print("\nhashing", f"\n{settings.hashing.model_dump_json(indent=4)}")
     print("\ndb", f"\n{settings.db.model_dump_json(indent=4)}")
     print("\nmail", f"\n{settings.mail.model_dump_json(indent=4)}")
     print("\nredis", f"\n{settings.redis.model_dump_json(indent=4)}")
+    print("\ndevices", f"\n{settings.devices.model_dump_json(indent=4)}")
+    print("\nmetrics", f"\n{settings.metrics.model_dump_json(indent=4)}")
 
     # Проверяем соединение с БД (соединение закроется или вернется в пул автоматически)
     try:
@@ -27,12 +39,53 @@ async def startup():
     except Exception:
         raise RuntimeError("Database connection check failed!")
 
+    # Открываем соединения с Redis заранее; без Redis приложение работает с ограничениями
+    try:
+        await redis_client.warm_up()
+    except Exception as e:
+        print(f"Redis warm-up failed: {e}")
+
+    # Проверяем реплику для чтения и следим за ее отставанием
+    await database.start_replica_monitor()
+
+    # Поднимаем пул воркеров для bcrypt
+    password_hasher.start()
+
+    # Загружаем отозванные токены и подписываемся на обновления
+    await revocation_store.start()
+
+    # Следим за каталогом ключей подписи JWT
+    keyring.start()
+
+    # Запускаем фоновую очистку истекших токенов
+    blacklist_reaper.start()
+
+    # Запускаем запись отметок активности устройств
+    device_activity.start()
+
+    # Отправка писем из очереди обычно работает отдельным процессом
+    if settings.email_outbox.run_in_app:
+        smtp_pool.start()
+        email_outbox.start()
+
 
 async def shutdown():
     """Выполняется при остановке приложения"""
     print("Shutdown")
+    await keyring.stop()
+    await blacklist_reaper.stop()
+    await revocation_store.stop()
+    await email_outbox.stop()
+    await smtp_pool.close()
+    # Записываем оставшиеся отметки активности устройств до закрытия пула
+    await device_activity.stop()
+    await database.stop_replica_monitor()
     # Закрываем все соединения в пуле
     await database.dispose()
+    # Закрываем соединения с Redis после остановки всех, кто их использует
+    await redis_client.close()
+    # Останавливаем пул воркеров для bcrypt
+    await password_hasher.shutdown()
 
 
 @asynccontextmanager
@@ -53,4 +106,8 @@ app = FastAPI(
 # Регистрируем обработчики исключений
 register_exception_handlers(app)
 
+# Счетчик запросов к БД и детектор N+1
+if settings.metrics.enabled:
+    app.middleware("http")(db_stats_middleware)
+
 app.include_router(api_v1_router)
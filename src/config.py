@@ -1,3 +1,4 @@
+from typing import Literal
 from pathlib import Path
 
 from pydantic import Field, BaseModel
@@ -32,6 +33,7 @@ class ApiV1Config(BaseModel):
     prefix: str = "/v1"
     auth: str = "/auth"
     users: str = "/users"
+    metrics: str = "/metrics"
 
 
 class SecuritySettings(BaseSettings):
@@ -41,13 +43,70 @@ class SecuritySettings(BaseSettings):
     public_pem_file: Path = Field(
         alias="SECURITY_PUBLIC_JWT", default=Path("certs/jwt-public.pem")
     )
-    algorithm: str = Field(default="RS256")
+    algorithm: Literal["RS256", "ES256", "EdDSA"] = Field(default="RS256")
+    """ Алгоритм подписи JWT (тип ключа должен ему соответствовать) """
+
+    keys_dir: Path | None = None
+    """ Каталог ключей для ротации: `<kid>.pem` и `<kid>.pub.pem` (вместо одной пары) """
+
+    active_kid: str | None = None
+    """ kid ключа подписи (по умолчанию - самый новый приватный ключ в `keys_dir`) """
+
+    keys_reload_interval: int = 60
+    """ Период проверки каталога ключей на изменения в секундах """
     access_token_expire_minutes: int = 15
     refresh_token_expire_minutes: int = 30 * 24 * 60  # 30 дней
 
+    payload_cache_size: int = 10_000
+    """ Максимальное количество проверенных payload токенов в кэше """
+
+    payload_cache_ttl: int = 15 * 60  # 15 минут
+    """ Максимальное время жизни payload в кэше в секундах (не дольше exp токена) """
+
     model_config = ModelConfig(env_prefix="SECURITY_")
 
 
+class RevocationSettings(BaseSettings):
+    channel: str = "revoked_tokens"
+    """ Канал Redis pub/sub для синхронизации отозванных токенов между репликами """
+
+    bloom_capacity: int = 100_000
+    """ Ожидаемое количество одновременно отозванных токенов """
+
+    bloom_error_rate: float = 0.001
+    """ Допустимая доля ложноположительных ответов фильтра Блума """
+
+    rebuild_interval: int = 60 * 60  # 1 час
+    """ Период полной пересборки фильтра из БД в секундах """
+
+    retry_interval: int = 5
+    """ Через сколько секунд повторять неудачную загрузку фильтра или оповещение реплик """
+
+    subject_check_ttl: int = 5
+    """ Сколько секунд реплика не перечитывает из Redis отметку выхода со всех устройств """
+
+    cleanup_interval: int = 5 * 60  # 5 минут
+    """ Период фоновой очистки истекших токенов из БД в секундах """
+
+    cleanup_batch_size: int = 5000
+    """ Количество записей, удаляемых за одну транзакцию при очистке """
+
+    model_config = ModelConfig(env_prefix="REVOCATION_")
+
+
+class HashingSettings(BaseSettings):
+    executor: Literal["thread", "process"] = "thread"
+    """ Тип пула воркеров для bcrypt: потоки или процессы """
+
+    max_workers: int = 4
+    """ Количество воркеров в пуле """
+
+    max_queue_depth: int = 64
+    """ Максимальное количество задач, ожидающих свободного воркера """
+
+    model_config = ModelConfig(env_prefix="HASHING_")
+
+
 class ServerSettings(BaseSettings):
     host: str
     port: int
@@ -71,6 +130,15 @@ class DatabaseSettings(BaseSettings):
     pool_size: int = 50
     max_overflow: int = 10
 
+    replica_dsn: str | None = None
+    """ DSN реплики для чтения (postgresql+asyncpg://...), None - чтение с основной БД """
+
+    replica_max_lag: float = 5.0
+    """ Максимальное отставание реплики в секундах, при превышении чтение идет с основной БД """
+
+    replica_check_interval: int = 5
+    """ Интервал проверки доступности и отставания реплики в секундах """
+
     naming_conventions: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
         "uq": "uq_%(table_name)s_%(column_0_name)s",
@@ -89,6 +157,18 @@ class MailSettings(BaseSettings):
     sender: str
     templates_path: Path
 
+    timeout: float = 30.0
+    """ Таймаут подключения и ответа SMTP-сервера в секундах """
+
+    pool_max_size: int = 5
+    """ Максимальное количество соединений с SMTP-сервером """
+
+    pool_idle_timeout: float = 300.0
+    """ Через сколько секунд простоя соединение с SMTP-сервером закрывается """
+
+    pool_keepalive_interval: float = 60.0
+    """ Период проверки простаивающих соединений командой NOOP в секундах """
+
     model_config = ModelConfig(env_prefix="MAIL_")
 
 
@@ -101,12 +181,152 @@ class RedisSettings(BaseSettings):
     password: str | None = None
     """ Пароль для аутентификации """
 
+    max_connections: int = 100
+    """ Максимальное количество соединений в пуле """
+
+    pool_timeout: float = 2.0
+    """ Сколько ждать свободное соединение, если заняты все `max_connections`, в секундах """
+
+    socket_timeout: float = 5.0
+    """ Таймаут ответа на команду в секундах (действует и на чтение pub/sub в redis-py 5.x) """
+
+    socket_connect_timeout: float = 2.0
+    """ Таймаут установки соединения в секундах """
+
+    health_check_interval: int = 30
+    """ Соединение, простаивавшее дольше (в секундах), проверяется PING перед использованием """
+
+    warmup_connections: int = 10
+    """ Количество соединений, открываемых при запуске приложения """
+
     verification_code_ttl: int = 300  # 5 минут в секундах
     """ Срок жизни верификационного кода в секундах """
 
+    verification_max_attempts: int = 5
+    """ Количество неверных попыток ввода кода, после которого код удаляется """
+
     model_config = ModelConfig(env_prefix="REDIS_")
 
 
+class UserCacheSettings(BaseSettings):
+    maxsize: int = 10_000
+    """ Максимальное количество пользователей в локальном кэше """
+
+    local_ttl: int = 10
+    """ Время жизни записи в локальном кэше в секундах """
+
+    redis_enabled: bool = False
+    """ Использовать ли Redis как второй уровень кэша """
+
+    redis_ttl: int = 60
+    """ Время жизни записи в Redis в секундах """
+
+    model_config = ModelConfig(env_prefix="USER_CACHE_")
+
+
+class DeviceActivitySettings(BaseSettings):
+    flush_interval: int = 30
+    """ Период записи накопленных отметок активности устройств в БД в секундах """
+
+    flush_batch_size: int = 1000
+    """ Количество строк в одном запросе `UPDATE ... FROM (VALUES ...)` """
+
+    model_config = ModelConfig(env_prefix="DEVICES_")
+
+
+class RateLimitSettings(BaseSettings):
+    enabled: bool = True
+    """ Ограничивать ли частоту запросов к входу, регистрации и отправке кода """
+
+    login_per_ip: int = 30
+    """ Количество попыток входа с одного IP-адреса за `login_period` """
+
+    login_per_email: int = 5
+    """ Количество попыток входа в один аккаунт за `login_period` """
+
+    login_period: int = 60
+    """ Период лимитов входа в секундах """
+
+    create_per_ip: int = 10
+    """ Количество регистраций с одного IP-адреса за `create_period` """
+
+    create_period: int = 600
+    """ Период лимита регистраций в секундах """
+
+    verification_per_user: int = 3
+    """ Количество отправок кода одному пользователю за `verification_period` """
+
+    verification_per_ip: int = 20
+    """ Количество отправок кода с одного IP-адреса за `verification_period` """
+
+    verification_period: int = 600
+    """ Период лимитов отправки кода в секундах """
+
+    local_maxsize: int = 10_000
+    """ Максимальное количество ключей в локальных лимитах (пока Redis недоступен) """
+
+    model_config = ModelConfig(env_prefix="RATE_LIMIT_")
+
+
+class EmailOutboxSettings(BaseSettings):
+    stream: str = "email_outbox"
+    """ Redis Stream с письмами к отправке """
+
+    group: str = "email_senders"
+    """ Группа потребителей, из которой читают воркеры """
+
+    max_attempts: int = 5
+    """ Количество попыток отправки, после которого письмо уходит в очередь недоставленных """
+
+    backoff_base: float = 2.0
+    """ Задержка перед второй попыткой в секундах, дальше удваивается """
+
+    backoff_max: float = 300.0
+    """ Максимальная задержка между попытками в секундах """
+
+    batch_size: int = 10
+    """ Количество писем, которые воркер читает и отправляет одновременно """
+
+    block_ms: int = 2000
+    """ Сколько ждать новые письма в одном `XREADGROUP` в миллисекундах (меньше `REDIS_SOCKET_TIMEOUT`) """
+
+    claim_idle: int = 60
+    """ Через сколько секунд письмо, взятое упавшим воркером, забирает другой воркер """
+
+    maxlen: int = 100_000
+    """ Примерная максимальная длина очереди """
+
+    dead_maxlen: int = 10_000
+    """ Примерная максимальная длина очереди недоставленных писем """
+
+    lag_report_interval: int = 30
+    """ Период записи в лог отставания очереди в секундах """
+
+    run_in_app: bool = False
+    """ Запускать ли воркер внутри приложения (для разработки, вместо отдельного процесса) """
+
+    model_config = ModelConfig(env_prefix="EMAIL_OUTBOX_")
+
+
+class MetricsSettings(BaseSettings):
+    enabled: bool = True
+    """ Отдавать ли метрики БД по адресу `/api/v1/metrics/` и считать запросы к БД """
+
+    debug: bool = False
+    """ Добавлять ли в ответы заголовок `X-DB-Summary` со сводкой запросов к БД """
+
+    log_queries: bool = False
+    """ Писать ли в лог сводку запросов к БД для каждого HTTP-запроса """
+
+    max_queries_per_request: int = 10
+    """ Количество запросов к БД в HTTP-запросе, выше которого пишется предупреждение """
+
+    repeated_statement_threshold: int = 3
+    """ Сколько раз одна форма SQL может повториться в HTTP-запросе до предупреждения о N+1 """
+
+    model_config = ModelConfig(env_prefix="METRICS_")
+
+
 class AppSettings(BaseSettings):
     name: str = "Anomer"
     app_version: str = "0.0.1"
@@ -117,10 +337,17 @@ class AppSettings(BaseSettings):
 class Settings:
     app = AppSettings()
     security = SecuritySettings()
+    hashing = HashingSettings()
+    revocation = RevocationSettings()
     server = ServerSettings()
     db = DatabaseSettings()
     mail = MailSettings()
     redis = RedisSettings()
+    user_cache = UserCacheSettings()
+    devices = DeviceActivitySettings()
+    rate_limit = RateLimitSettings()
+    email_outbox = EmailOutboxSettings()
+    metrics = MetricsSettings()
 
 
 settings = Settings()
@@ -1,3 +1,4 @@
+import asyncio
 from typing import AsyncGenerator
 
 from sqlalchemy import text
@@ -9,6 +10,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.config import settings
+from src.database.metrics import db_metrics
 
 
 class Database:
@@ -19,6 +21,9 @@ class Database:
         echo_pool: bool = False,
         max_overflow: int = 10,
         pool_size: int = 5,
+        replica_url: str | None = None,
+        replica_max_lag: float = 5.0,
+        replica_check_interval: int = 5,
     ):
         self.engine: AsyncEngine = create_async_engine(
             url=url,
@@ -26,22 +31,141 @@ class Database:
             echo_pool=echo_pool,
             max_overflow=max_overflow,
             pool_size=pool_size,
+            poolclass=db_metrics.pool_class("primary"),
         )
+        db_metrics.attach(self.engine, "primary")
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine, autoflush=False, autocommit=False, expire_on_commit=False
         )
 
+        # реплика для чтения (необязательная)
+        self.replica_engine: AsyncEngine | None = None
+        self.replica_session_factory: async_sessionmaker[AsyncSession] | None = None
+        if replica_url:
+            self.replica_engine = create_async_engine(
+                url=replica_url,
+                echo=echo,
+                echo_pool=echo_pool,
+                max_overflow=max_overflow,
+                pool_size=pool_size,
+                # соединения с упавшей репликой не должны зависать в пуле
+                pool_pre_ping=True,
+                poolclass=db_metrics.pool_class("replica"),
+            )
+            db_metrics.attach(self.replica_engine, "replica")
+            self.replica_session_factory = async_sessionmaker(
+                bind=self.replica_engine,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+            )
+        self.replica_max_lag = replica_max_lag
+        self.replica_check_interval = replica_check_interval
+        # пока реплика не проверена, читаем с основной БД
+        self.replica_available = False
+        self._replica_monitor: asyncio.Task | None = None
+
     async def dispose(self) -> None:
         await self.engine.dispose()
+        if self.replica_engine is not None:
+            await self.replica_engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Зависимость FastAPI - единица работы (unit of work) на весь запрос.
+
+        FastAPI кэширует результат зависимости в пределах запроса, поэтому все
+        зависимости и представления, объявившие `Depends(database.session_getter)`,
+        получают одну и ту же сессию. Соединение берется из пула лениво - при первом
+        обращении к БД, - и возвращается в пул при закрытии сессии.
+        """
         async with self.session_factory() as session:
             yield session
 
+    @property
+    def read_session_factory(self) -> async_sessionmaker[AsyncSession]:
+        """
+        Фабрика сессий только для чтения: реплика, если она доступна и отстает
+        не больше `replica_max_lag` секунд, иначе - основная БД.
+        """
+        if self.replica_available:
+            return self.replica_session_factory
+        return self.session_factory
+
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Зависимость FastAPI - сессия только для чтения.
+
+        Используется эндпоинтами, которые допускают чтение данных с отставанием
+        реплики. Запись через эту сессию недопустима. Не разделяется с
+        `session_getter`: это отдельная сессия со своим соединением.
+        """
+        async with self.read_session_factory() as session:
+            yield session
+
     async def check_db_connection(self):
         async with self.engine.connect() as conn:
             await conn.execute(text("SELECT 1"))
 
+    async def get_replica_lag(self) -> float:
+        """
+        Возвращает отставание реплики в секундах.
+        Если все полученные WAL уже применены, отставание равно нулю
+        (иначе при простое основной БД оно росло бы бесконечно).
+        """
+        async with self.replica_engine.connect() as conn:
+            lag = await conn.scalar(
+                text(
+                    "SELECT CASE"
+                    " WHEN NOT pg_is_in_recovery()"
+                    "   OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"
+                    " THEN 0"
+                    " ELSE COALESCE(EXTRACT(EPOCH FROM"
+                    "   now() - pg_last_xact_replay_timestamp()), 0)"
+                    " END"
+                )
+            )
+        return float(lag)
+
+    async def check_replica(self) -> None:
+        """Проверяет доступность и отставание реплики и переключает чтение"""
+        try:
+            lag = await asyncio.wait_for(
+                self.get_replica_lag(), timeout=self.replica_check_interval
+            )
+        except Exception as e:
+            if self.replica_available:
+                print(f"Replica is unavailable, reading from primary: {e!r}")
+            self.replica_available = False
+            return
+
+        available = lag <= self.replica_max_lag
+        if available != self.replica_available:
+            print(
+                f"Replica lag {lag:.1f}s, reading from "
+                f"{'replica' if available else 'primary'}"
+            )
+        self.replica_available = available
+
+    async def start_replica_monitor(self) -> None:
+        """Проверяет реплику и запускает ее периодическую проверку"""
+        if self.replica_engine is None or self._replica_monitor is not None:
+            return
+        await self.check_replica()
+        self._replica_monitor = asyncio.create_task(self._monitor_replica())
+
+    async def stop_replica_monitor(self) -> None:
+        if self._replica_monitor is None:
+            return
+        self._replica_monitor.cancel()
+        await asyncio.gather(self._replica_monitor, return_exceptions=True)
+        self._replica_monitor = None
+
+    async def _monitor_replica(self) -> None:
+        while True:
+            await asyncio.sleep(self.replica_check_interval)
+            await self.check_replica()
+
 
 database = Database(
     url=settings.db.async_dsn,
@@ -49,4 +173,7 @@ database = Database(
     echo_pool=settings.db.echo_pool,
     max_overflow=settings.db.max_overflow,
     pool_size=settings.db.pool_size,
+    replica_url=settings.db.replica_dsn,
+    replica_max_lag=settings.db.replica_max_lag,
+    replica_check_interval=settings.db.replica_check_interval,
 )
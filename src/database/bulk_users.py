@@ -0,0 +1,239 @@
+"""
+Массовый импорт и экспорт пользователей через `COPY` (asyncpg).
+
+Импорт:
+- записи читаются потоково (CSV или NDJSON), проверяются пачками по `batch_size`
+- пароли принимаются только уже хэшированными (bcrypt), хэширование не выполняется
+- пачка загружается `COPY FROM STDIN` во временную таблицу и переносится в `users`
+  одним `INSERT ... SELECT ... ON CONFLICT DO NOTHING` (занятые email пропускаются)
+- каждая пачка - отдельная транзакция, прогресс передается в `on_progress`
+
+Экспорт - `COPY (SELECT ...) TO STDOUT` с потоковой отдачей кусков по мере чтения.
+"""
+
+import csv
+import json
+import time
+import asyncio
+from typing import Literal, Callable, Iterable, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.database import database
+from src.schemas.users import UserImportRecord, UsersImportReport
+
+ImportFormat = Literal["csv", "ndjson"]
+
+IMPORT_COLUMNS = ("email", "password", "username", "role", "status")
+EXPORT_COLUMNS = ("id", "email", "username", "password", "role", "status", "created_at")
+STAGING_TABLE = "users_import"
+MAX_REPORTED_ERRORS = 100
+
+# разделитель и кавычка, которых нет в JSON: COPY в режиме csv ничего не экранирует
+_RAW_COPY_OPTIONS = {"format": "csv", "delimiter": "\x02", "quote": "\x01"}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Разбивает поток байтов на строки (без символа перевода строки)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def parse_records(
+    lines: AsyncIterator[str], fmt: ImportFormat
+) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Разбирает строки CSV (с заголовком) или NDJSON.
+
+    Yields:
+        `(номер строки, запись, ошибка разбора)`
+    """
+    header: list[str] | None = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Некорректный JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Ожидался JSON-объект"
+                continue
+            yield line_number, record, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, None, f"Ожидалось {len(header)} колонок, получено {len(values)}"
+            continue
+        # пустые ячейки CSV - значения по умолчанию
+        yield line_number, {k: v for k, v in zip(header, values) if v != ""}, None
+
+
+class UsersImporter:
+    """Загрузка пользователей пачками через временную таблицу"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        batch_size: int = 10_000,
+        on_progress: Callable[[UsersImportReport], None] | None = None,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.report = UsersImportReport()
+
+    def _reject(self, line_number: int, error: str) -> None:
+        self.report.invalid += 1
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(f"строка {line_number}: {error}")
+
+    def _validate(self, batch: Iterable[tuple[int, dict]]) -> list[tuple]:
+        rows = []
+        for line_number, record in batch:
+            try:
+                user = UserImportRecord.model_validate(record)
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                )
+                self._reject(line_number, error)
+                continue
+            rows.append(
+                (user.email, user.password, user.username, user.role.value, user.status.value)
+            )
+        return rows
+
+    async def _load(self, connection, rows: list[tuple]) -> int:
+        """Загружает проверенную пачку, возвращает количество вставленных строк"""
+        async with connection.transaction():
+            await connection.copy_records_to_table(
+                STAGING_TABLE, records=rows, columns=IMPORT_COLUMNS
+            )
+            status = await connection.execute(
+                f"INSERT INTO users ({', '.join(IMPORT_COLUMNS)}) "
+                f"SELECT {', '.join(IMPORT_COLUMNS)} FROM {STAGING_TABLE} "
+                "ON CONFLICT DO NOTHING"
+            )
+            await connection.execute(f"TRUNCATE {STAGING_TABLE}")
+        # статус вида "INSERT 0 <количество>"
+        return int(status.rsplit(" ", 1)[-1])
+
+    async def _flush(self, connection, batch: list[tuple[int, dict]]) -> None:
+        rows = self._validate(batch)
+        self.report.valid += len(rows)
+        if rows:
+            inserted = await self._load(connection, rows)
+            self.report.inserted += inserted
+            self.report.skipped += len(rows) - inserted
+        if self.on_progress is not None:
+            self.on_progress(self.report)
+
+    async def run(
+        self, lines: AsyncIterator[str], fmt: ImportFormat
+    ) -> UsersImportReport:
+        started = time.perf_counter()
+        async with self.engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            connection = raw_connection.driver_connection
+
+            # временная таблица с теми же типами колонок, что и в users
+            await connection.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} AS "
+                f"SELECT {', '.join(IMPORT_COLUMNS)} FROM users WITH NO DATA"
+            )
+            try:
+                batch: list[tuple[int, dict]] = []
+                async for line_number, record, error in parse_records(lines, fmt):
+                    self.report.received += 1
+                    if error is not None:
+                        self._reject(line_number, error)
+                        continue
+                    batch.append((line_number, record))
+                    if len(batch) >= self.batch_size:
+                        await self._flush(connection, batch)
+                        batch = []
+                if batch:
+                    await self._flush(connection, batch)
+            finally:
+                await connection.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+        self.report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return self.report
+
+
+async def import_users(
+    lines: AsyncIterator[str],
+    fmt: ImportFormat,
+    batch_size: int = 10_000,
+    on_progress: Callable[[UsersImportReport], None] | None = None,
+) -> UsersImportReport:
+    """
+    Импортирует пользователей из строк CSV или NDJSON.
+
+    Колонки/поля: `email`, `password` (bcrypt-хэш), необязательные `username`,
+    `role`, `status`. Пользователи с уже занятыми email или username пропускаются.
+    """
+    importer = UsersImporter(
+        engine=database.engine, batch_size=batch_size, on_progress=on_progress
+    )
+    return await importer.run(lines, fmt)
+
+
+async def export_users(fmt: ImportFormat) -> AsyncIterator[bytes]:
+    """
+    Экспортирует всех пользователей (с хэшами паролей) в CSV с заголовком или NDJSON.
+    Данные отдаются кусками по мере чтения, память не зависит от размера таблицы.
+    """
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM users ORDER BY id"
+    if fmt == "csv":
+        options = {"format": "csv", "header": True}
+    else:
+        query = f"SELECT row_to_json(u) FROM ({query}) u"
+        options = _RAW_COPY_OPTIONS
+
+    # ограниченная очередь: COPY ждет, пока клиент заберет данные
+    chunks: asyncio.Queue[bytes | Exception | None] = asyncio.Queue(maxsize=16)
+
+    async def copy() -> None:
+        try:
+            async with database.engine.connect() as conn:
+                raw_connection = await conn.get_raw_connection()
+                await raw_connection.driver_connection.copy_from_query(
+                    query, output=chunks.put, **options
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await chunks.put(e)
+            return
+        await chunks.put(None)
+
+    task = asyncio.create_task(copy())
+    try:
+        while (chunk := await chunks.get()) is not None:
+            if isinstance(chunk, Exception):
+                raise chunk
+            # asyncpg отдает bytearray, Starlette ждет bytes
+            yield bytes(chunk)
+    finally:
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
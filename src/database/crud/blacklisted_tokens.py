@@ -1,12 +1,20 @@
-from typing import Optional
+from typing import Optional, Sequence
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import table, column, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.tables import BlacklistedToken
+from src.database.metrics import instrumented
+from src.database.partitions import blacklisted_tokens_partitions
 
+# строки вне дневных партиций; истекшие дневные партиции удаляются целиком
+_default_partition = table(
+    blacklisted_tokens_partitions.default_partition, column("id"), column("expires_at")
+)
 
+
+@instrumented
 async def add_to_blacklist(
     session: AsyncSession, jti: str, token_type: str, user_id: str, expires_at: datetime
 ) -> BlacklistedToken:
@@ -40,6 +48,7 @@ async def add_to_blacklist(
     return blacklisted_token
 
 
+@instrumented
 async def is_token_blacklisted(session: AsyncSession, jti: str) -> bool:
     """
     Проверяет, находится ли токен в черном списке.
@@ -51,11 +60,40 @@ async def is_token_blacklisted(session: AsyncSession, jti: str) -> bool:
     Returns:
         bool: True, если токен в черном списке, False в противном случае
     """
-    stmt = select(BlacklistedToken).where(BlacklistedToken.jti == jti)
+    current_timestamp = int(datetime.now(timezone.utc).timestamp())
+
+    # условие на expires_at отсекает партиции истекших токенов
+    stmt = select(BlacklistedToken.id).where(
+        BlacklistedToken.jti == jti, BlacklistedToken.expires_at >= current_timestamp
+    )
     result = await session.execute(stmt)
     return result.scalar_one_or_none() is not None
 
 
+@instrumented
+async def get_active_blacklisted_tokens(
+    session: AsyncSession,
+) -> Sequence[tuple[str, int]]:
+    """
+    Получает JTI и время истечения всех еще не истекших деактивированных токенов.
+    Используется для пересборки хранилища отозванных токенов.
+
+    Args:
+        session: Сессия базы данных
+
+    Returns:
+        Sequence[tuple[str, int]]: Пары (jti, expires_at)
+    """
+    current_timestamp = int(datetime.now(timezone.utc).timestamp())
+
+    stmt = select(BlacklistedToken.jti, BlacklistedToken.expires_at).where(
+        BlacklistedToken.expires_at >= current_timestamp
+    )
+    result = await session.execute(stmt)
+    return result.tuples().all()
+
+
+@instrumented
 async def get_blacklisted_token(
     session: AsyncSession, jti: str
 ) -> Optional[BlacklistedToken]:
@@ -74,24 +112,31 @@ async def get_blacklisted_token(
     return result.scalar_one_or_none()
 
 
-async def cleanup_expired_tokens(session: AsyncSession) -> int:
+@instrumented
+async def cleanup_expired_tokens(session: AsyncSession, batch_size: int = 5000) -> int:
     """
-    Удаляет истекшие токены из черного списка для очистки БД.
+    Удаляет одну порцию истекших токенов из партиции по умолчанию.
+    Дневные партиции удаляются целиком (`blacklisted_tokens_partitions.drop_expired`).
+    Порция ограничена `batch_size`, чтобы не держать долгие блокировки;
+    строки, заблокированные другой транзакцией, пропускаются.
 
     Args:
         session: Сессия базы данных
+        batch_size: Максимальное количество удаляемых записей
 
     Returns:
         int: Количество удаленных записей
     """
-    from sqlalchemy import delete
-
     # Получаем текущий Unix timestamp
     current_timestamp = int(datetime.now(timezone.utc).timestamp())
 
-    stmt = delete(BlacklistedToken).where(
-        BlacklistedToken.expires_at < current_timestamp
+    expired_ids = (
+        select(_default_partition.c.id)
+        .where(_default_partition.c.expires_at < current_timestamp)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
     )
+    stmt = delete(_default_partition).where(_default_partition.c.id.in_(expired_ids))
 
     result = await session.execute(stmt)
     await session.commit()
@@ -99,6 +144,7 @@ async def cleanup_expired_tokens(session: AsyncSession) -> int:
     return result.rowcount
 
 
+@instrumented
 async def get_user_blacklisted_tokens(
     session: AsyncSession, user_id: str, limit: int = 50
 ) -> list[BlacklistedToken]:
@@ -0,0 +1,118 @@
+from uuid import UUID, uuid4
+from typing import Mapping
+
+from sqlalchemy import BigInteger, func, column, insert, select, update, values, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+
+from src.database.tables import Device, DeviceSession
+from src.database.metrics import instrumented
+from src.database.pg_func import unix_timestamp
+
+
+@instrumented
+async def start_device_session(
+    session: AsyncSession,
+    user_id: int,
+    device_id: UUID | None,
+    ip_address: str | None,
+    user_agent: str | None,
+) -> tuple[UUID, UUID]:
+    """
+    Регистрирует вход пользователя с устройства одним запросом: создает устройство
+    (или отмечает активность уже известного устройства этого пользователя) и новую сессию.
+    Если `device_id` не передан или принадлежит другому пользователю,
+    создается новое устройство.
+
+    Args:
+        session: Сессия базы данных
+        user_id: ID пользователя
+        device_id: ID устройства, присланный клиентом
+        ip_address: IP-адрес клиента
+        user_agent: User-Agent клиента
+
+    Returns:
+        tuple[UUID, UUID]: ID устройства и ID сессии
+    """
+    session_id = uuid4()
+
+    for candidate_id in (device_id, uuid4()):
+        if candidate_id is None:
+            continue
+
+        device = (
+            pg_insert(Device)
+            .values(id=candidate_id, user_id=user_id)
+            .on_conflict_do_update(
+                index_elements=[Device.id],
+                set_={"last_seen": unix_timestamp()},
+                where=Device.user_id == user_id,
+            )
+            .returning(Device.id)
+            .cte("device")
+        )
+        stmt = (
+            insert(DeviceSession)
+            .from_select(
+                ["id", "device_id", "ip_address", "user_agent"],
+                select(
+                    literal(session_id, PG_UUID(as_uuid=True)),
+                    device.c.id,
+                    literal(ip_address),
+                    literal(user_agent),
+                ),
+            )
+            .returning(DeviceSession.device_id)
+        )
+
+        result = await session.execute(stmt)
+        if (registered_device_id := result.scalar_one_or_none()) is not None:
+            await session.commit()
+            return registered_device_id, session_id
+
+    raise RuntimeError("Не удалось зарегистрировать устройство")
+
+
+@instrumented
+async def update_last_seen(
+    session: AsyncSession,
+    model: type[Device] | type[DeviceSession],
+    last_seen: Mapping[UUID, int],
+    batch_size: int = 1000,
+) -> int:
+    """
+    Записывает отметки последней активности пачками:
+    `UPDATE ... SET last_seen = GREATEST(...) FROM (VALUES (...), ...)`.
+    Отметка не уменьшается, поэтому порядок записи с разных реплик не важен.
+    Строки обновляются в порядке ID, чтобы параллельные записи не взаимоблокировались.
+
+    Args:
+        session: Сессия базы данных
+        model: `Device` или `DeviceSession`
+        last_seen: ID записи -> Unix timestamp последней активности
+        batch_size: Максимальное количество строк в одном запросе
+
+    Returns:
+        int: Количество обновленных записей (удаленные записи пропускаются)
+    """
+    rows = sorted(last_seen.items())
+    updated = 0
+
+    for start in range(0, len(rows), batch_size):
+        seen = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("last_seen", BigInteger),
+            name="seen",
+        ).data(rows[start : start + batch_size])
+
+        stmt = (
+            update(model)
+            .where(model.id == seen.c.id)
+            .values(last_seen=func.greatest(model.last_seen, seen.c.last_seen))
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        updated += result.rowcount
+
+    await session.commit()
+    return updated
@@ -1,13 +1,35 @@
-from typing import Sequence
+from typing import Sequence, NamedTuple, AsyncIterator
 
-from sqlalchemy import select, update
+from sqlalchemy import Row, Select, delete, exists, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 import src.schemas.users as scheme
-from src.entities import UserStatus
+from src.entities import UserRole, UserStatus
 from src.database.tables import User
+from src.database.metrics import instrumented
+from src.database.user_cache import user_cache
+from src.security.refresh_tokens import refresh_token_families
 
 
+class UserCredentials(NamedTuple):
+    """Данные пользователя для входа"""
+
+    id: int
+    email: str
+    password: str
+    role: UserRole
+    status: UserStatus
+
+
+class UserStatusEmail(NamedTuple):
+    """Статус и email пользователя"""
+
+    status: UserStatus
+    email: str
+
+
+@instrumented
 async def get_user(
     session: AsyncSession, email: str = None, user_id: int = None
 ) -> User:
@@ -23,37 +45,150 @@ async def get_user(
     return result
 
 
-async def get_all_users(session: AsyncSession) -> Sequence[User]:
-    stmt = select(User).order_by(User.id)
-    result = await session.scalars(stmt)
+# Запросы ниже выбирают только нужные колонки и не создают ORM-объекты
+# (без гидрации и identity map) - для горячих путей, которым не нужна сущность целиком
+
+
+@instrumented
+async def get_user_credentials(
+    session: AsyncSession, email: str
+) -> UserCredentials | None:
+    """
+    Получает данные для входа пользователя по email.
+
+    Returns:
+        UserCredentials | None: Данные пользователя или None, если он не найден
+    """
+    stmt = select(
+        User.id, User.email, User.password, User.role, User.status
+    ).where(User.email == email)
+    row = (await session.execute(stmt)).first()
+
+    return UserCredentials(*row) if row else None
+
+
+@instrumented
+async def get_user_snapshot(
+    session: AsyncSession, email: str
+) -> scheme.UserSnapshot | None:
+    """
+    Получает снимок пользователя (без хэша пароля) по email.
+
+    Returns:
+        UserSnapshot | None: Снимок пользователя или None, если он не найден
+    """
+    stmt = select(User.id, User.email, User.role, User.status).where(
+        User.email == email
+    )
+    row = (await session.execute(stmt)).first()
+
+    return scheme.UserSnapshot.model_validate(row) if row else None
+
 
+@instrumented
+async def get_user_status_and_email(
+    session: AsyncSession, user_id: int
+) -> UserStatusEmail | None:
+    """
+    Получает статус и email пользователя одним запросом.
+
+    Returns:
+        UserStatusEmail | None: Статус и email или None, если пользователь не найден
+    """
+    stmt = select(User.status, User.email).where(User.id == user_id)
+    row = (await session.execute(stmt)).first()
+
+    return UserStatusEmail(*row) if row else None
+
+
+def _users_after_stmt(after_id: int) -> Select[tuple[int, str]]:
+    # выбираем только публичные колонки: без хэша пароля и ORM-объектов
+    return select(User.id, User.email).where(User.id > after_id).order_by(User.id)
+
+
+@instrumented
+async def get_users_page(
+    session: AsyncSession, after_id: int = 0, limit: int = 100
+) -> Sequence[Row[tuple[int, str]]]:
+    """
+    Получает страницу пользователей (keyset-пагинация по `id`).
+
+    Args:
+        session: Сессия базы данных
+        after_id: ID последнего пользователя предыдущей страницы
+        limit: Размер страницы
+
+    Returns:
+        Sequence[Row[tuple[int, str]]]: Строки (id, email), упорядоченные по id
+    """
+    result = await session.execute(_users_after_stmt(after_id).limit(limit))
     return result.all()
 
 
-async def create_user(session: AsyncSession, user_create: scheme.UserCreateIn) -> User:
-    user = User(**user_create.model_dump())
+@instrumented
+async def stream_users(
+    session: AsyncSession, after_id: int = 0, batch_size: int = 1000
+) -> AsyncIterator[Sequence[Row[tuple[int, str]]]]:
+    """
+    Потоково читает пользователей серверным курсором пачками по `batch_size` строк.
+    В памяти одновременно находится не больше одной пачки.
+
+    Args:
+        session: Сессия базы данных
+        after_id: ID, после которого начинать чтение
+        batch_size: Размер пачки
 
-    session.add(user)
+    Yields:
+        Sequence[Row[tuple[int, str]]]: Пачки строк (id, email), упорядоченные по id
+    """
+    result = await session.stream(
+        _users_after_stmt(after_id).execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
 
+
+@instrumented
+async def create_user(
+    session: AsyncSession, user_create: scheme.UserCreateIn
+) -> int | None:
+    """
+    Создает пользователя одним запросом `INSERT ... ON CONFLICT DO NOTHING RETURNING id`.
+
+    Args:
+        session: Сессия базы данных
+        user_create: Данные пользователя (пароль уже хэширован)
+
+    Returns:
+        int | None: ID созданного пользователя или None, если email уже занят
+    """
+    stmt = (
+        pg_insert(User)
+        .values(**user_create.model_dump())
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+    user_id = await session.scalar(stmt)
     await session.commit()
-    await session.refresh(user)
 
-    return user
+    return user_id
 
 
+@instrumented
 async def is_user_exists(session: AsyncSession, user_id: int) -> bool:
-    stmt = select(User).where(User.id == user_id)
-    result = await session.scalar(stmt)
-    return result is not None
+    stmt = select(exists().where(User.id == user_id))
+    return await session.scalar(stmt)
 
 
+@instrumented
 async def is_user_email_verified(session: AsyncSession, user_id: int) -> bool:
-    stmt = select(User).where(User.id == user_id)
+    stmt = select(User.status).where(User.id == user_id)
     result = await session.scalar(stmt)
 
-    return result.status == UserStatus.ACTIVATED
+    return result == UserStatus.ACTIVATED
 
 
+@instrumented
 async def verify_user_email(session: AsyncSession, email: str) -> bool:
     """
     Обновляет статус верификации email пользователя
@@ -71,6 +206,8 @@ async def verify_user_email(session: AsyncSession, email: str) -> bool:
         )
         result = await session.execute(stmt)
         await session.commit()
+        # статус изменился - снимок пользователя в кэше устарел
+        await user_cache.invalidate(email)
 
         return result.rowcount > 0
     except Exception as e:
@@ -79,9 +216,33 @@ async def verify_user_email(session: AsyncSession, email: str) -> bool:
         return False
 
 
+# сколько удаленных пользователей сбрасывается в Redis за один конвейер
+FORGET_USERS_CHUNK_SIZE = 1000
+
+
+async def _forget_users(emails: Sequence[str]) -> None:
+    """
+    Сбрасывает кэш и refresh токены удаленных пользователей.
+    Порциями по `FORGET_USERS_CHUNK_SIZE`: на порцию - один `DEL` и один конвейер
+    скриптов вместо двух запросов в Redis на каждого пользователя.
+    """
+    for start in range(0, len(emails), FORGET_USERS_CHUNK_SIZE):
+        chunk = emails[start : start + FORGET_USERS_CHUNK_SIZE]
+        await user_cache.invalidate_many(chunk)
+
+        try:
+            # refresh токены удаленных пользователей больше не обновляются
+            await refresh_token_families.revoke_all_many(chunk)
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+
+@instrumented
 async def delete_user(session: AsyncSession, user_id: int) -> bool:
     """
-    Удаляет пользователя и все связанные с ним данные каскадом.
+    Удаляет пользователя одним запросом `DELETE ... RETURNING`.
+    Связанные записи удаляет сама БД (`ON DELETE CASCADE` во внешних ключах),
+    они не загружаются в память приложения.
 
     Args:
         session: Сессия базы данных
@@ -90,14 +251,84 @@ async def delete_user(session: AsyncSession, user_id: int) -> bool:
     Returns:
         bool: True если пользователь успешно удален
     """
-    # Получаем пользователя с загруженными связями
-    user = await get_user(session=session, user_id=user_id)
-    if not user:
+    stmt = delete(User).where(User.id == user_id).returning(User.id, User.email)
+    row = (await session.execute(stmt)).first()
+    await session.commit()
+
+    if row is None:
         return False
 
-    # Удаляем пользователя - SQLAlchemy автоматически удалит связанные записи
-    # благодаря cascade="all, delete-orphan" в relationship
-    await session.delete(user)
-    await session.commit()
+    await _forget_users([row.email])
 
     return True
+
+
+@instrumented
+async def delete_users(
+    session: AsyncSession, user_ids: Sequence[int]
+) -> Sequence[int]:
+    """
+    Удаляет пользователей по списку ID одним запросом.
+    Связанные записи удаляет сама БД (`ON DELETE CASCADE`).
+
+    Args:
+        session: Сессия базы данных
+        user_ids: ID пользователей для удаления
+
+    Returns:
+        Sequence[int]: ID удаленных пользователей
+    """
+    stmt = (
+        delete(User).where(User.id.in_(user_ids)).returning(User.id, User.email)
+    )
+    rows = (await session.execute(stmt)).all()
+    await session.commit()
+
+    await _forget_users([email for _, email in rows])
+
+    return [user_id for user_id, _ in rows]
+
+
+@instrumented
+async def set_tokens_not_before(
+    session: AsyncSession, user_id: int, not_before: int
+) -> bool:
+    """
+    Делает недействительными все токены пользователя, выпущенные раньше `not_before`.
+
+    Args:
+        session: Сессия базы данных
+        user_id: ID пользователя
+        not_before: Unix timestamp
+
+    Returns:
+        bool: True если пользователь найден
+    """
+    stmt = (
+        update(User).where(User.id == user_id).values(tokens_not_before=not_before)
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+
+    return result.rowcount > 0
+
+
+@instrumented
+async def get_tokens_not_before(
+    session: AsyncSession, since: int
+) -> Sequence[tuple[str, int]]:
+    """
+    Получает email и `tokens_not_before` пользователей, отозвавших токены после `since`.
+
+    Args:
+        session: Сессия базы данных
+        since: Unix timestamp
+
+    Returns:
+        Sequence[tuple[str, int]]: Пары (email, tokens_not_before)
+    """
+    stmt = select(User.email, User.tokens_not_before).where(
+        User.tokens_not_before > since
+    )
+    result = await session.execute(stmt)
+    return result.tuples().all()
@@ -0,0 +1,231 @@
+"""
+Метрики пула соединений и запросов к БД.
+
+- ожидание соединения из пула (гистограмма), таймауты пула, соединения сверх
+  `pool_size` (overflow) - через подкласс `AsyncAdaptedQueuePool`
+- занятые соединения и текущий overflow - из состояния пула в момент снятия метрик
+- задержка каждого запроса (гистограмма) с меткой вызвавшей CRUD-функции -
+  через события `before_cursor_execute`/`after_cursor_execute`
+
+CRUD-функции помечаются декоратором `@instrumented`, метка передается через `ContextVar`.
+Те же события заполняют счетчики запросов `src/database/query_stats.py`.
+"""
+
+import time
+import inspect
+import functools
+from typing import Callable
+from contextvars import ContextVar
+
+from sqlalchemy import exc, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.histogram import Histogram
+from src.database.query_stats import active_db_stats
+
+UNLABELLED = "other"
+
+# CRUD-функция, выполняющая запрос
+query_label: ContextVar[str] = ContextVar("query_label", default=UNLABELLED)
+
+
+def instrumented(func: Callable) -> Callable:
+    """
+    Помечает запросы, выполненные внутри корутины (или асинхронного генератора),
+    ее именем `<модуль>.<функция>`.
+    """
+    label = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def generator_wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    # метка ставится только на время шага генератора,
+                    # чтобы не протечь в код, который его потребляет
+                    token = query_label.set(label)
+                    try:
+                        item = await anext(generator)
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        query_label.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = query_label.set(label)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            query_label.reset(token)
+
+    return wrapper
+
+
+class PoolMetrics:
+    """Метрики одного пула соединений"""
+
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+        self.overflow_connections = 0
+        self.engine: AsyncEngine | None = None
+
+
+class DatabaseMetrics:
+    """Метрики всех пулов и запросов приложения"""
+
+    def __init__(self):
+        self.pools: dict[str, PoolMetrics] = {}
+        self.statements: dict[str, Histogram] = {}
+        self.statement_errors: dict[str, int] = {}
+
+    def pool_class(self, name: str) -> type[AsyncAdaptedQueuePool]:
+        """
+        Возвращает класс пула, измеряющий ожидание соединения.
+        Метрики хранятся в атрибуте класса, поэтому переживают `engine.dispose()`
+        (пул пересоздается через `self.__class__`).
+        """
+        pool_metrics = self.pools.setdefault(name, PoolMetrics())
+
+        class InstrumentedPool(AsyncAdaptedQueuePool):
+            metrics = pool_metrics
+
+            def _do_get(self):
+                started = time.perf_counter()
+                try:
+                    return super()._do_get()
+                except exc.TimeoutError:
+                    self.metrics.timeouts += 1
+                    raise
+                finally:
+                    waited = time.perf_counter() - started
+                    self.metrics.checkout_wait.observe(waited)
+                    for stats in active_db_stats.get():
+                        stats.pool_wait += waited
+
+            def _inc_overflow(self) -> bool:
+                created = super()._inc_overflow()
+                if created and self._overflow > 0:
+                    self.metrics.overflow_connections += 1
+                return created
+
+        InstrumentedPool.__name__ = f"InstrumentedPool[{name}]"
+        return InstrumentedPool
+
+    def attach(self, engine: AsyncEngine, name: str) -> None:
+        """Подписывается на события запросов движка"""
+        self.pools.setdefault(name, PoolMetrics()).engine = engine
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            context._query_started = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+            elapsed = time.perf_counter() - context._query_started
+            label = query_label.get()
+            if (histogram := self.statements.get(label)) is None:
+                histogram = self.statements[label] = Histogram()
+            histogram.observe(elapsed)
+
+            for stats in active_db_stats.get():
+                stats.record(statement, elapsed)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(context):
+            label = query_label.get()
+            self.statement_errors[label] = self.statement_errors.get(label, 0) + 1
+
+    def _pools_state(self) -> dict[str, dict]:
+        state = {}
+        for name, pool_metrics in self.pools.items():
+            if pool_metrics.engine is None:
+                continue
+            # пул берется из движка: после `dispose()` это уже новый объект
+            pool = pool_metrics.engine.sync_engine.pool
+            state[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return state
+
+    def snapshot(self) -> dict:
+        return {
+            "pools": {
+                name: {
+                    **self._pools_state().get(name, {}),
+                    "checkout_wait_seconds": pool_metrics.checkout_wait.snapshot(),
+                    "timeouts": pool_metrics.timeouts,
+                    "overflow_connections": pool_metrics.overflow_connections,
+                }
+                for name, pool_metrics in self.pools.items()
+            },
+            "statements": {
+                label: {
+                    "latency_seconds": histogram.snapshot(),
+                    "errors": self.statement_errors.get(label, 0),
+                }
+                for label, histogram in self.statements.items()
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """Возвращает метрики в текстовом формате Prometheus"""
+        lines = []
+
+        def histogram_lines(metric: str, labels: str, histogram: Histogram):
+            for bound, count in histogram.cumulative():
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+        lines.append("# TYPE db_pool_size gauge")
+        lines.append("# TYPE db_pool_checked_out gauge")
+        lines.append("# TYPE db_pool_overflow gauge")
+        for name, state in self._pools_state().items():
+            lines.append(f'db_pool_size{{pool="{name}"}} {state["size"]}')
+            lines.append(f'db_pool_checked_out{{pool="{name}"}} {state["checked_out"]}')
+            lines.append(f'db_pool_overflow{{pool="{name}"}} {state["overflow"]}')
+
+        lines.append("# TYPE db_pool_checkout_wait_seconds histogram")
+        for name, pool_metrics in self.pools.items():
+            histogram_lines(
+                "db_pool_checkout_wait_seconds",
+                f'pool="{name}"',
+                pool_metrics.checkout_wait,
+            )
+
+        lines.append("# TYPE db_pool_timeouts_total counter")
+        lines.append("# TYPE db_pool_overflow_connections_total counter")
+        for name, pool_metrics in self.pools.items():
+            lines.append(f'db_pool_timeouts_total{{pool="{name}"}} {pool_metrics.timeouts}')
+            lines.append(
+                f'db_pool_overflow_connections_total{{pool="{name}"}} '
+                f"{pool_metrics.overflow_connections}"
+            )
+
+        lines.append("# TYPE db_statement_duration_seconds histogram")
+        for label, histogram in self.statements.items():
+            histogram_lines(
+                "db_statement_duration_seconds", f'function="{label}"', histogram
+            )
+
+        lines.append("# TYPE db_statement_errors_total counter")
+        for label, errors in self.statement_errors.items():
+            lines.append(f'db_statement_errors_total{{function="{label}"}} {errors}')
+
+        return "\n".join(lines) + "\n"
+
+
+db_metrics = DatabaseMetrics()
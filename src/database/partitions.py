@@ -0,0 +1,143 @@
+"""
+Дневные партиции таблиц, секционированных по диапазону Unix timestamp (`PARTITION BY RANGE`).
+
+Каждая партиция хранит сутки (UTC): `<таблица>_pYYYYMMDD`, значения `[начало дня, начало
+следующего дня)`. Строки вне созданных партиций попадают в `<таблица>_default`.
+
+- новые партиции создаются заранее: пустая таблица заполняется строками нужного
+  диапазона из партиции по умолчанию и присоединяется через `ATTACH PARTITION`.
+  Родительская таблица при этом берется в `SHARE UPDATE EXCLUSIVE` и остается доступной
+  для чтения и записи, но партиция по умолчанию блокируется в `ACCESS EXCLUSIVE` и
+  сканируется на строки нового диапазона - поэтому партиции создаются заранее, пока
+  партиция по умолчанию почти пуста
+- партиция, все строки которой истекли, удаляется целиком через `DROP TABLE` - без
+  построчного `DELETE`, мертвых строк и нагрузки на VACUUM
+"""
+
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+DAY = 24 * 60 * 60
+
+# сколько ждать блокировку родительской таблицы при удалении партиции
+DROP_LOCK_TIMEOUT = "5s"
+
+
+class DailyPartitions:
+    """Управление дневными партициями одной таблицы"""
+
+    def __init__(self, table: str, column: str):
+        self.table = table
+        self.column = column
+        self.default_partition = f"{table}_default"
+        self._name_pattern = re.compile(rf"^{re.escape(table)}_p(\d{{8}})$")
+
+    @staticmethod
+    def day_start(timestamp: int) -> int:
+        return timestamp - timestamp % DAY
+
+    def is_partition(self, name: str) -> bool:
+        return name == self.default_partition or bool(self._name_pattern.match(name))
+
+    def partition_name(self, day_start: int) -> str:
+        day = datetime.fromtimestamp(day_start, tz=timezone.utc)
+        return f"{self.table}_p{day:%Y%m%d}"
+
+    async def existing(self, conn: AsyncConnection) -> dict[str, int]:
+        """
+        Returns:
+            `dict[str, int]`: имя дневной партиции -> начало ее дня (Unix timestamp)
+        """
+        result = await conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:table AS regclass)"
+            ),
+            {"table": self.table},
+        )
+        partitions = {}
+        for name in result.scalars():
+            if match := self._name_pattern.match(name):
+                day = datetime.strptime(match.group(1), "%Y%m%d")
+                partitions[name] = int(day.replace(tzinfo=timezone.utc).timestamp())
+        return partitions
+
+    async def create(self, conn: AsyncConnection, day_start: int) -> None:
+        """
+        Создает партицию дня, переносит в нее строки этого дня из партиции по
+        умолчанию и присоединяет к таблице. Выполняется в одной транзакции.
+        """
+        name = self.partition_name(day_start)
+        day_end = day_start + DAY
+
+        await conn.execute(
+            text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {self.table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        # иначе ATTACH PARTITION откажет: такие строки уже лежат в партиции по умолчанию
+        await conn.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {self.default_partition} "
+                f"WHERE {self.column} >= :day_start AND {self.column} < :day_end "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"day_start": day_start, "day_end": day_end},
+        )
+        await conn.execute(
+            text(
+                f"ALTER TABLE {self.table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ({day_start}) TO ({day_end})"
+            )
+        )
+        await conn.commit()
+
+    async def ensure(self, conn: AsyncConnection, now: int, days_ahead: int) -> list[str]:
+        """
+        Создает недостающие партиции с текущего дня на `days_ahead` дней вперед.
+
+        Returns:
+            `list[str]`: имена созданных партиций
+        """
+        existing = set((await self.existing(conn)).values())
+        await conn.commit()
+
+        created = []
+        today = self.day_start(now)
+        for day in range(days_ahead + 1):
+            day_start = today + day * DAY
+            if day_start not in existing:
+                await self.create(conn, day_start)
+                created.append(self.partition_name(day_start))
+        return created
+
+    async def drop_expired(self, conn: AsyncConnection, now: int) -> list[str]:
+        """
+        Удаляет партиции, в которых все значения меньше `now`.
+
+        Returns:
+            `list[str]`: имена удаленных партиций
+        """
+        existing = await self.existing(conn)
+        await conn.commit()
+
+        dropped = []
+        for name, day_start in sorted(existing.items(), key=lambda item: item[1]):
+            if day_start + DAY > now:
+                continue
+            # не вставать в очередь блокировок за долгими запросами к таблице
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{DROP_LOCK_TIMEOUT}'"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+            await conn.commit()
+            dropped.append(name)
+        return dropped
+
+
+blacklisted_tokens_partitions = DailyPartitions(
+    table="blacklisted_tokens", column="expires_at"
+)
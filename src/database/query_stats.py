@@ -0,0 +1,116 @@
+"""
+Подсчет запросов к БД в пределах HTTP-запроса или блока кода.
+
+Счетчики заполняются событиями движка (см. `src/database/metrics.py`).
+Одновременно может быть активно несколько счетчиков (например, счетчик
+middleware и `assert_max_queries` в проверке), каждый видит все запросы своего блока.
+
+Повторение одной и той же формы запроса (SQL без значений параметров) внутри
+одного HTTP-запроса - типичный признак N+1: запрос выполняется в цикле вместо одного
+запроса для всех строк.
+"""
+
+import re
+from typing import Iterator
+from contextlib import contextmanager
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import field, dataclass
+
+_PARAMETER = re.compile(
+    r"\$\d+(?:::[A-Za-z_][\w\[\]]*(?: WITH(?:OUT)? TIME ZONE)?)?|%\(\w+\)s|\?"
+)
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Приводит SQL к форме без параметров: `$1::INTEGER` -> `?`,
+    списки параметров `IN (?, ?, ?)` -> `IN (?)`, пробелы схлопываются.
+    """
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+@dataclass
+class RequestDbStats:
+    """Сводка работы с БД в рамках одного HTTP-запроса или блока кода"""
+
+    queries: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    """ Количество выполнений каждой формы запроса """
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные не меньше `threshold` раз (подозрение на N+1)"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+    def header(self) -> str:
+        return (
+            f"queries={self.queries}; db_ms={self.db_time * 1000:.1f}; "
+            f"pool_wait_ms={self.pool_wait * 1000:.1f}"
+        )
+
+
+# активные счетчики текущего контекста
+active_db_stats: ContextVar[tuple[RequestDbStats, ...]] = ContextVar(
+    "active_db_stats", default=()
+)
+
+
+@contextmanager
+def count_queries() -> Iterator[RequestDbStats]:
+    """
+    Считает запросы к БД, выполненные внутри блока (в том же контексте или
+    в задачах, созданных из него).
+
+    ```python
+    with count_queries() as stats:
+        await client.get("/api/v1/users/me/", headers=headers)
+    print(stats.queries, stats.db_time)
+    ```
+    """
+    stats = RequestDbStats()
+    token = active_db_stats.set((*active_db_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        active_db_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[RequestDbStats]:
+    """
+    Проверяет, что внутри блока выполнено не больше `limit` запросов к БД.
+
+    ```python
+    with assert_max_queries(2):
+        response = await client.get("/api/v1/users/me/", headers=headers)
+    ```
+
+    Raises:
+        - `AssertionError`: со списком выполненных запросов, если лимит превышен
+    """
+    with count_queries() as stats:
+        yield stats
+
+    if stats.queries > limit:
+        statements = "\n".join(
+            f"  {count}x {shape}" for shape, count in stats.shapes.most_common()
+        )
+        raise AssertionError(
+            f"Ожидалось не больше {limit} запросов к БД, выполнено {stats.queries}:\n"
+            f"{statements}"
+        )
@@ -1,5 +1,6 @@
 from .base import Base
 from .users import User
+from .device import Device, DeviceSession
 from .blacklisted_tokens import BlacklistedToken
 
-__all__ = ["Base", "BlacklistedToken", "User"]
+__all__ = ["Base", "BlacklistedToken", "Device", "DeviceSession", "User"]
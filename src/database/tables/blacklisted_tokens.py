@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, BigInteger, ForeignKey
+from sqlalchemy import String, BigInteger, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
 from src.database.tables.base import Base
@@ -8,10 +8,23 @@ from src.database.tables.base import Base
 import src.database.mixins as mixins
 
 
-class BlacklistedToken(Base, mixins.IntIDMixin, mixins.CreatedAt, mixins.UpdatedAt):
-    """Таблица для черного списка токенов (деактивированные токены)"""
+class BlacklistedToken(Base, mixins.CreatedAt, mixins.UpdatedAt):
+    """
+    Таблица для черного списка токенов (деактивированные токены).
 
-    jti: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+    Секционирована по `expires_at` по дням (см. `src/database/partitions.py`):
+    истекшие токены удаляются целыми партициями. Поэтому `expires_at` входит
+    в первичный ключ и в уникальное ограничение на `jti`.
+    """
+
+    __table_args__ = (
+        UniqueConstraint("jti", "expires_at"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+
+    jti: Mapped[str] = mapped_column(String(255), nullable=False)
     """ JWT ID - уникальный идентификатор токена """
 
     token_type: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -22,8 +35,10 @@ class BlacklistedToken(Base, mixins.IntIDMixin, mixins.CreatedAt, mixins.Updated
     )
     """ ID пользователя, которому принадлежал токен """
 
-    expires_at: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    """ Время истечения токена в Unix timestamp (секунды от epoch) """
+    expires_at: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, nullable=False, index=True
+    )
+    """ Время истечения токена в Unix timestamp (секунды от epoch), ключ секционирования """
 
     # Связь с пользователем
     user: Mapped["User"] = relationship(
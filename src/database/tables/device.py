@@ -3,18 +3,16 @@ from typing import TYPE_CHECKING
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
-from src.database.tables import Base
-
-from src.entities import DeviceType
-
 import src.database.mixins as mixins
+from src.entities import DeviceType
+from src.database.tables.base import Base
 
 
 class Device(Base, mixins.UuidIDMixin, mixins.FirstSeen, mixins.LastSeen, mixins.CreatedAt, mixins.UpdatedAt):
     """ Таблица, содержащая информацию об устройствах пользователей """
 
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     """ ID пользователя, которому принадлежит устройство """
 
@@ -55,13 +53,21 @@ class Device(Base, mixins.UuidIDMixin, mixins.FirstSeen, mixins.LastSeen, mixins
     user: Mapped["User"] = relationship(
         "User", back_populates="devices", passive_deletes=True
     )
-    
 
-class DeviceSession(Base, mixins.UuidIDMixin, mixins.CreatedAt, mixins.UpdatedAt):
+    # Связь с сессиями устройства
+    sessions: Mapped[list["DeviceSession"]] = relationship(
+        "DeviceSession",
+        back_populates="device",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class DeviceSession(Base, mixins.UuidIDMixin, mixins.LastSeen, mixins.CreatedAt, mixins.UpdatedAt):
     """ Таблица, содержащая информацию о сессиях устройств пользователей """
     
     device_id: Mapped[str] = mapped_column(
-        ForeignKey("devices.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True
     )
     """ ID устройства, которому принадлежит сессия """
     
@@ -75,11 +81,6 @@ class DeviceSession(Base, mixins.UuidIDMixin, mixins.CreatedAt, mixins.UpdatedAt
     device: Mapped["Device"] = relationship(
         "Device", back_populates="sessions", passive_deletes=True
     )
-    
-    # Связь с пользователем
-    user: Mapped["User"] = relationship(
-        "User", back_populates="sessions", passive_deletes=True
-    )
 
 
 if TYPE_CHECKING:
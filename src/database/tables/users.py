@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+from sqlalchemy import BigInteger
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
 from src.entities import UserStatus, UserRole
@@ -33,6 +34,9 @@ class User(Base, mixins.IntIDMixin, mixins.CreatedAt, mixins.UpdatedAt):
     )
     """ Статус пользователя """
 
+    tokens_not_before: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    """ Unix timestamp: все токены, выпущенные раньше, недействительны (выход со всех устройств) """
+
     # Связь с деактивированными токенами
     blacklisted_tokens: Mapped[list["BlacklistedToken"]] = relationship(
         "BlacklistedToken",
@@ -41,6 +45,15 @@ class User(Base, mixins.IntIDMixin, mixins.CreatedAt, mixins.UpdatedAt):
         passive_deletes=True,
     )
 
+    # Связь с устройствами
+    devices: Mapped[list["Device"]] = relationship(
+        "Device",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
 
 if TYPE_CHECKING:
+    from src.database.tables.device import Device
     from src.database.tables.blacklisted_tokens import BlacklistedToken
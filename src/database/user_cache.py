@@ -0,0 +1,111 @@
+"""
+Кэш снимков пользователей для авторизованных запросов.
+
+Первый уровень - локальный LRU-кэш с коротким TTL, второй (опционально) - Redis.
+Записи сбрасываются в CRUD-функциях, изменяющих пользователя.
+На других репликах локальная запись может устареть не более чем на `local_ttl` секунд.
+"""
+
+from typing import Sequence
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.schemas.users import UserSnapshot
+from src.utils.ttl_cache import TTLCache
+from src.utils.redis_client import redis_client
+
+
+class UserCache:
+    """Двухуровневый кэш `UserSnapshot` по email"""
+
+    KEY_PREFIX = "user_snapshot:"
+
+    def __init__(
+        self,
+        redis_connection: redis.Redis,
+        maxsize: int,
+        local_ttl: int,
+        redis_enabled: bool,
+        redis_ttl: int,
+    ):
+        self.redis = redis_connection
+        self.redis_enabled = redis_enabled
+        self.redis_ttl = redis_ttl
+        self._local: TTLCache[str, UserSnapshot] = TTLCache(
+            maxsize=maxsize, ttl=local_ttl
+        )
+
+    def _key(self, email: str) -> str:
+        return f"{self.KEY_PREFIX}{email}"
+
+    async def get(self, email: str) -> UserSnapshot | None:
+        """Возвращает снимок пользователя или `None`, если его нет в кэше"""
+        if (snapshot := self._local.get(email)) is not None:
+            return snapshot
+
+        if not self.redis_enabled:
+            return None
+
+        try:
+            raw = await self.redis.get(self._key(email))
+        except Exception as e:
+            print(f"Redis error: {e}")
+            return None
+
+        if raw is None:
+            return None
+
+        snapshot = UserSnapshot.model_validate_json(raw)
+        self._local.set(email, snapshot)
+        return snapshot
+
+    async def set(self, snapshot: UserSnapshot) -> None:
+        self._local.set(snapshot.email, snapshot)
+
+        if not self.redis_enabled:
+            return
+
+        try:
+            await self.redis.setex(
+                self._key(snapshot.email), self.redis_ttl, snapshot.model_dump_json()
+            )
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+    async def invalidate(self, email: str) -> None:
+        """Удаляет снимок пользователя из обоих уровней кэша"""
+        self._local.pop(email)
+
+        if not self.redis_enabled:
+            return
+
+        try:
+            await self.redis.delete(self._key(email))
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+    async def invalidate_many(self, emails: Sequence[str]) -> None:
+        """Удаляет снимки нескольких пользователей: одна команда `DEL` в Redis"""
+        for email in emails:
+            self._local.pop(email)
+
+        if not self.redis_enabled or not emails:
+            return
+
+        try:
+            await self.redis.delete(*(self._key(email) for email in emails))
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+    def stats(self) -> dict:
+        return self._local.stats()
+
+
+user_cache = UserCache(
+    redis_connection=redis_client.redis,
+    maxsize=settings.user_cache.maxsize,
+    local_ttl=settings.user_cache.local_ttl,
+    redis_enabled=settings.user_cache.redis_enabled,
+    redis_ttl=settings.user_cache.redis_ttl,
+)
@@ -10,4 +10,6 @@ USER_ALREADY_EXISTS = ErrorCode(400, "USER_ALREADY_EXISTS")
 EMAIL_ALREADY_VERIFIED = ErrorCode(409, "EMAIL_ALREADY_VERIFIED")
 UNABLE_SEND_EMAIL = ErrorCode(500, "UNABLE_SEND_EMAIL")
 INCORRECT_VERIFICATION_CODE = ErrorCode(400, "INCORRECT_VERIFICATION_CODE")
+VERIFICATION_ATTEMPTS_EXCEEDED = ErrorCode(429, "VERIFICATION_ATTEMPTS_EXCEEDED")
 USER_DELETE_ERROR = ErrorCode(500, "USER_DELETE_ERROR")
+SERVER_BUSY = ErrorCode(503, "SERVER_BUSY")
@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,5 @@ class TokenInfo(BaseModel):
     access_token: str
     refresh_token: str | None = None
     token_type: str = "Bearer"
+    device_id: UUID | None = None
+    """ ID устройства: клиент передает его в заголовке `X-Device-Id` при следующем входе """
@@ -1,4 +1,18 @@
-from pydantic import EmailStr, BaseModel
+from pydantic import Field, EmailStr, BaseModel, ConfigDict
+
+from src.entities import UserRole, UserStatus
+
+
+# Кэш авторизации
+class UserSnapshot(BaseModel):
+    """Компактный снимок пользователя (без хэша пароля) для кэша авторизации"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    role: UserRole
+    status: UserStatus
 
 
 # GET /users/
@@ -29,6 +43,44 @@ class UserDeleteOut(BaseModel):
     message: str
 
 
+# /delete-bulk/
+# ---
+class UsersBulkDeleteIn(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=10_000)
+
+
+class UsersBulkDeleteOut(BaseModel):
+    deleted_ids: list[int]
+    not_found_ids: list[int]
+    message: str
+
+
+# /import/, /export/
+# ---
+class UserImportRecord(BaseModel):
+    """Пользователь для массового импорта (пароль - готовый bcrypt-хэш)"""
+
+    email: EmailStr
+    password: str = Field(pattern=r"^\$2[aby]?\$\d{2}\$[./A-Za-z0-9]{53}$")
+    username: str | None = None
+    role: UserRole = UserRole.USER
+    status: UserStatus = UserStatus.CREATED
+
+
+class UsersImportReport(BaseModel):
+    """Результат (или текущий прогресс) массового импорта"""
+
+    received: int = 0
+    valid: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    """ Пропущено из-за занятого email или username """
+    invalid: int = 0
+    errors: list[str] = []
+    """ Первые ошибки проверки """
+    elapsed_seconds: float = 0.0
+
+
 # /send-verification/
 # ---
 class EmailVerificationIn(BaseModel):
@@ -51,3 +103,4 @@ class VerifyCodeIn(BaseModel):
 class VerifyCodeOut(BaseModel):
     verified: bool
     message: str
+    attempts_left: int | None = None
@@ -4,14 +4,19 @@ from datetime import datetime, timezone, timedelta
 
 import jwt
 import bcrypt
+from jwt.exceptions import InvalidTokenError
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PublicKeyTypes,
+    PrivateKeyTypes,
+)
 
-from src.config import settings
+from src.security.keys import keyring
 
 
 def encode_jwt(
     payload: dict,
-    private_key: str = settings.security.secret_pem_file.read_text(),
-    algorithm: str = settings.security.algorithm,
+    private_key: PrivateKeyTypes | str | None = None,
+    algorithm: str | None = None,
     expire_timedelta: timedelta | None = None,
     expire_minutes: int | None = None,
 ):
@@ -22,8 +27,8 @@ def encode_jwt(
 
     Args:
         - `payload`: данные токена
-        - `private_key`: приватный ключ
-        - `algorithm`: алгоритм шифрования
+        - `private_key`: приватный ключ (по умолчанию - активный ключ из keyring)
+        - `algorithm`: алгоритм подписи (обязателен, если передан `private_key`)
         - `expire_timedelta`: время жизни токена
         - `expire_minutes`: время жизни токена в минутах
 
@@ -44,14 +49,24 @@ def encode_jwt(
     # добавляем поля expire (когда истекает) и issued_at (когда создан)
     to_encode.update(exp=expire, iat=now)
 
-    encoded = jwt.encode(to_encode, private_key, algorithm=algorithm)
+    if private_key is None:
+        # подписываем активным ключом и указываем его kid в заголовке
+        signing_key = keyring.signing_key
+        encoded = jwt.encode(
+            to_encode,
+            signing_key.private_key,
+            algorithm=signing_key.algorithm,
+            headers={"kid": signing_key.kid},
+        )
+    else:
+        encoded = jwt.encode(to_encode, private_key, algorithm=algorithm)
     return encoded
 
 
 def decode_jwt(
     token: str | bytes,
-    public_key: str = settings.security.public_pem_file.read_text(),
-    algorithm: str = settings.security.algorithm,
+    public_key: PublicKeyTypes | str | None = None,
+    algorithm: str | None = None,
 ) -> dict:
     """
     Декодирует JWT токен с использованием публичного ключа.
@@ -59,12 +74,19 @@ def decode_jwt(
 
     Args:
         - `token`: JWT токен
-        - `public_key`: публичный ключ
-        - `algorithm`: алгоритм шифрования
+        - `public_key`: публичный ключ (по умолчанию - ключ из keyring по `kid`)
+        - `algorithm`: алгоритм подписи (обязателен, если передан `public_key`)
 
     Returns:
         `dict`: данные токена (payload)
     """
+    if public_key is None:
+        # выбираем ключ проверки по kid из заголовка токена
+        kid = jwt.get_unverified_header(token).get("kid")
+        if (key := keyring.get_or_reload(kid)) is None:
+            raise InvalidTokenError(f"Неизвестный идентификатор ключа: {kid}")
+        public_key, algorithm = key.public_key, key.algorithm
+
     decoded = jwt.decode(token, public_key, algorithms=[algorithm])
     return decoded
 
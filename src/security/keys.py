@@ -0,0 +1,331 @@
+"""
+Связка ключей подписи JWT (keyring).
+
+Ключи загружаются в объекты `cryptography` один раз и перечитываются с диска
+при изменении каталога ключей. Каждый ключ имеет идентификатор `kid`, который
+записывается в заголовок токена; ключ для проверки выбирается по `kid` за O(1).
+
+Если каталог ключей (`SECURITY_KEYS_DIR`) не задан, используется единственная пара
+`SECURITY_PRIVATE_JWT` / `SECURITY_PUBLIC_JWT`, а `kid` - ее JWK thumbprint (RFC 7638).
+"""
+
+import json
+import time
+import base64
+import asyncio
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass
+
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm, RSAAlgorithm
+from cryptography.hazmat.primitives.asymmetric import ec, rsa, ed25519
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_public_key,
+    load_pem_private_key,
+)
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PublicKeyTypes,
+    PrivateKeyTypes,
+)
+
+from src.config import settings
+
+# алгоритм JWT -> допустимый тип приватного ключа
+ALGORITHM_KEY_TYPES: dict[str, type] = {
+    "RS256": rsa.RSAPrivateKey,
+    "ES256": ec.EllipticCurvePrivateKey,
+    "EdDSA": ed25519.Ed25519PrivateKey,
+}
+
+PRIVATE_KEY_SUFFIX = ".pem"
+PUBLIC_KEY_SUFFIX = ".pub.pem"
+
+
+def load_private_key(path: Path) -> PrivateKeyTypes:
+    """Загружает приватный ключ из PEM-файла"""
+    return load_pem_private_key(path.read_bytes(), password=None)
+
+
+def load_public_key(path: Path) -> PublicKeyTypes:
+    """Загружает публичный ключ из PEM-файла"""
+    return load_pem_public_key(path.read_bytes())
+
+
+def check_key_algorithm(private_key: PrivateKeyTypes, algorithm: str) -> None:
+    """
+    Проверяет, что тип ключа подходит для алгоритма.
+
+    Raises:
+        - `ValueError`: если алгоритм не поддерживается или тип ключа не совпадает
+    """
+    if (key_type := ALGORITHM_KEY_TYPES.get(algorithm)) is None:
+        raise ValueError(f"Алгоритм '{algorithm}' не поддерживается")
+
+    if not isinstance(private_key, key_type):
+        raise ValueError(
+            f"Ключ типа '{type(private_key).__name__}' не подходит для алгоритма '{algorithm}'"
+        )
+
+    if algorithm == "ES256" and not isinstance(private_key.curve, ec.SECP256R1):
+        raise ValueError("Для алгоритма 'ES256' нужен ключ на кривой P-256")
+
+
+def algorithm_for_key(key: PrivateKeyTypes | PublicKeyTypes) -> str:
+    """
+    Определяет алгоритм JWT по типу ключа.
+
+    Raises:
+        - `ValueError`: если тип ключа не поддерживается
+    """
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return "ES256"
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"Ключ типа '{type(key).__name__}' не поддерживается")
+
+
+def public_jwk(public_key: PublicKeyTypes) -> dict:
+    """Возвращает публичный ключ в формате JWK"""
+    match algorithm_for_key(public_key):
+        case "RS256":
+            return RSAAlgorithm.to_jwk(public_key, as_dict=True)
+        case "ES256":
+            return ECAlgorithm.to_jwk(public_key, as_dict=True)
+        case _:
+            return OKPAlgorithm.to_jwk(public_key, as_dict=True)
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    """Вычисляет JWK thumbprint (RFC 7638) в base64url без выравнивания"""
+    required = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+    members = {
+        name: jwk[name] for name in required.get(jwk["kty"], ("crv", "kty", "x"))
+    }
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode("utf-8")).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+@dataclass(frozen=True)
+class JwtKey:
+    """Ключ подписи JWT"""
+
+    kid: str
+    """ Идентификатор ключа (заголовок `kid` токена) """
+
+    algorithm: str
+    """ Алгоритм подписи """
+
+    public_key: PublicKeyTypes
+    """ Публичный ключ для проверки подписи """
+
+    private_key: PrivateKeyTypes | None = None
+    """ Приватный ключ для подписи (None - ключ только для проверки) """
+
+    modified_at: float = 0.0
+    """ Время изменения файла ключа """
+
+
+class KeyRing:
+    """
+    Набор ключей подписи JWT.
+
+    В каталоге ключей:
+    - `<kid>.pem` - приватный ключ (подписывает и проверяет)
+    - `<kid>.pub.pem` - публичный ключ (только проверяет, например выведенный из ротации)
+
+    Подписывает ключ `active_kid`, а если он не задан - самый новый приватный ключ.
+    """
+
+    def __init__(
+        self,
+        keys_dir: Path | None,
+        active_kid: str | None,
+        private_path: Path,
+        public_path: Path,
+        algorithm: str,
+        reload_interval: int,
+    ):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self.private_path = private_path
+        self.public_path = public_path
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+
+        self._keys: dict[str, JwtKey] = {}
+        self._signing_key: JwtKey | None = None
+        self._fingerprint: tuple = ()
+        self._last_reload_check = 0.0
+        self._watcher: asyncio.Task | None = None
+
+        self.jwks: dict = {"keys": []}
+        self.jwks_etag: str = ""
+
+        self.load()
+
+    @property
+    def signing_key(self) -> JwtKey:
+        """Ключ, которым подписываются новые токены"""
+        return self._signing_key
+
+    def get(self, kid: str | None) -> JwtKey | None:
+        """
+        Возвращает ключ проверки по `kid`.
+        Токены без `kid` (выпущенные до появления keyring) проверяются активным ключом.
+        """
+        if kid is None:
+            return self._signing_key
+        return self._keys.get(kid)
+
+    def get_or_reload(self, kid: str | None) -> JwtKey | None:
+        """
+        Как `get`, но при неизвестном `kid` перечитывает каталог ключей
+        (не чаще раза в секунду) - ключ могли добавить на другой реплике.
+        """
+        if (key := self.get(kid)) is not None:
+            return key
+
+        now = time.monotonic()
+        if now - self._last_reload_check >= 1:
+            self._last_reload_check = now
+            self.reload_if_changed()
+
+        return self.get(kid)
+
+    def _directory_fingerprint(self) -> tuple:
+        if self.keys_dir is None:
+            return ()
+        return tuple(
+            sorted(
+                (path.name, path.stat().st_mtime_ns)
+                for path in self.keys_dir.glob(f"*{PRIVATE_KEY_SUFFIX}")
+            )
+        )
+
+    def _load_single_pair(self) -> list[JwtKey]:
+        private_key = load_private_key(self.private_path)
+        check_key_algorithm(private_key, self.algorithm)
+        public_key = load_public_key(self.public_path)
+
+        return [
+            JwtKey(
+                kid=jwk_thumbprint(public_jwk(public_key)),
+                algorithm=self.algorithm,
+                public_key=public_key,
+                private_key=private_key,
+            )
+        ]
+
+    def _load_directory(self) -> list[JwtKey]:
+        keys = []
+        for path in sorted(self.keys_dir.glob(f"*{PRIVATE_KEY_SUFFIX}")):
+            modified_at = path.stat().st_mtime
+
+            if path.name.endswith(PUBLIC_KEY_SUFFIX):
+                kid = path.name.removesuffix(PUBLIC_KEY_SUFFIX)
+                public_key, private_key = load_public_key(path), None
+            else:
+                kid = path.name.removesuffix(PRIVATE_KEY_SUFFIX)
+                private_key = load_private_key(path)
+                public_key = private_key.public_key()
+
+            keys.append(
+                JwtKey(
+                    kid=kid,
+                    algorithm=algorithm_for_key(public_key),
+                    public_key=public_key,
+                    private_key=private_key,
+                    modified_at=modified_at,
+                )
+            )
+        return keys
+
+    def load(self) -> None:
+        """
+        Загружает ключи и атомарно заменяет текущий набор.
+
+        Raises:
+            - `ValueError`: если нет ключа для подписи
+        """
+        fingerprint = self._directory_fingerprint()
+        keys = self._load_directory() if self.keys_dir else self._load_single_pair()
+        keys_by_kid = {key.kid: key for key in keys}
+
+        signing_candidates = [key for key in keys if key.private_key is not None]
+        if self.active_kid:
+            signing_key = keys_by_kid.get(self.active_kid)
+            if signing_key is None or signing_key.private_key is None:
+                raise ValueError(f"Приватный ключ с kid '{self.active_kid}' не найден")
+        elif signing_candidates:
+            signing_key = max(signing_candidates, key=lambda key: key.modified_at)
+        else:
+            raise ValueError("Не найден ни один приватный ключ для подписи JWT")
+
+        jwks = {
+            "keys": [
+                {
+                    **public_jwk(key.public_key),
+                    "kid": key.kid,
+                    "alg": key.algorithm,
+                    "use": "sig",
+                }
+                for key in keys
+            ]
+        }
+        jwks_body = json.dumps(jwks, sort_keys=True).encode("utf-8")
+
+        self._keys = keys_by_kid
+        self._signing_key = signing_key
+        self._fingerprint = fingerprint
+        self.jwks = jwks
+        self.jwks_etag = f'"{hashlib.sha256(jwks_body).hexdigest()[:32]}"'
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает каталог ключей, если он изменился. Возвращает True при перезагрузке"""
+        if self.keys_dir is None:
+            return False
+
+        try:
+            if self._directory_fingerprint() == self._fingerprint:
+                return False
+            self.load()
+        except Exception as e:
+            # оставляем предыдущий набор ключей рабочим
+            print(f"Keyring reload error: {e}")
+            return False
+
+        print(
+            f"Keyring reloaded: kids={list(self._keys)}, active={self._signing_key.kid}"
+        )
+        return True
+
+    def start(self) -> None:
+        """Запускает фоновую проверку каталога ключей"""
+        if self.keys_dir is not None and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watcher is None:
+            return
+        self._watcher.cancel()
+        await asyncio.gather(self._watcher, return_exceptions=True)
+        self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            self.reload_if_changed()
+
+
+keyring = KeyRing(
+    keys_dir=settings.security.keys_dir,
+    active_kid=settings.security.active_kid,
+    private_path=settings.security.secret_pem_file,
+    public_path=settings.security.public_pem_file,
+    algorithm=settings.security.algorithm,
+    reload_interval=settings.security.keys_reload_interval,
+)
@@ -0,0 +1,196 @@
+"""Асинхронное хэширование и проверка паролей в ограниченном пуле воркеров"""
+
+import time
+import asyncio
+from typing import Any, Callable
+from dataclasses import dataclass
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from src.config import settings
+from src.security import hashing_encoding
+
+
+class HashingQueueFullError(Exception):
+    """Очередь задач хэширования переполнена"""
+
+
+def _timed_call(func: Callable, *args) -> tuple[Any, float]:
+    """
+    Выполняется внутри воркера. Возвращает результат вызова `func`
+    и чистое время вычисления в секундах.
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+@dataclass
+class HashingMetrics:
+    """Метрики пула хэширования"""
+
+    submitted: int = 0
+    """ Количество принятых задач """
+
+    rejected: int = 0
+    """ Количество задач, отклоненных из-за переполнения очереди """
+
+    completed: int = 0
+    """ Количество завершенных задач """
+
+    wait_time_total: float = 0.0
+    """ Суммарное время ожидания свободного воркера в секундах """
+
+    wait_time_max: float = 0.0
+    """ Максимальное время ожидания свободного воркера в секундах """
+
+    compute_time_total: float = 0.0
+    """ Суммарное время вычисления хэша в секундах """
+
+    compute_time_max: float = 0.0
+    """ Максимальное время вычисления хэша в секундах """
+
+    def observe(self, wait_time: float, compute_time: float) -> None:
+        self.completed += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.compute_time_total += compute_time
+        self.compute_time_max = max(self.compute_time_max, compute_time)
+
+    def snapshot(self) -> dict:
+        """Возвращает метрики в виде словаря (время в миллисекундах)"""
+        completed = self.completed or 1
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "wait_ms_avg": self.wait_time_total / completed * 1000,
+            "wait_ms_max": self.wait_time_max * 1000,
+            "compute_ms_avg": self.compute_time_total / completed * 1000,
+            "compute_ms_max": self.compute_time_max * 1000,
+        }
+
+    def render_prometheus(self, in_flight: int) -> str:
+        """Возвращает метрики в текстовом формате Prometheus"""
+        lines = [
+            "# TYPE password_hashing_in_flight gauge",
+            f"password_hashing_in_flight {in_flight}",
+            "# TYPE password_hashing_submitted_total counter",
+            f"password_hashing_submitted_total {self.submitted}",
+            "# TYPE password_hashing_rejected_total counter",
+            f"password_hashing_rejected_total {self.rejected}",
+        ]
+        for metric, total, maximum in (
+            ("password_hashing_wait_seconds", self.wait_time_total, self.wait_time_max),
+            (
+                "password_hashing_compute_seconds",
+                self.compute_time_total,
+                self.compute_time_max,
+            ),
+        ):
+            lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {self.completed}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines.append(f"{metric}_max {maximum}")
+
+        return "\n".join(lines) + "\n"
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt в пуле потоков или процессов, чтобы не блокировать event loop.
+
+    Количество одновременно принятых задач ограничено `max_workers + max_queue_depth`,
+    при превышении выбрасывается `HashingQueueFullError`.
+    """
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_queue_depth: int = 64,
+    ):
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.metrics = HashingMetrics()
+
+        self._executor: Executor | None = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Количество задач, которые выполняются или ожидают воркера"""
+        return self._in_flight
+
+    def start(self) -> None:
+        """Создает пул воркеров"""
+        if self._executor is not None:
+            return
+
+        if self.executor_type == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="bcrypt"
+            )
+
+    async def shutdown(self) -> None:
+        """Останавливает пул воркеров, дожидаясь выполнения начатых задач"""
+        if self._executor is None:
+            return
+
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _run(self, func: Callable, *args) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue_depth:
+            self.metrics.rejected += 1
+            raise HashingQueueFullError("Очередь задач хэширования переполнена")
+
+        self.start()
+        self.metrics.submitted += 1
+        self._in_flight += 1
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.perf_counter()
+        try:
+            result, compute_time = await loop.run_in_executor(
+                self._executor, _timed_call, func, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+        # всё, что не ушло на вычисление, - ожидание в очереди и накладные расходы
+        total_time = time.perf_counter() - submitted_at
+        self.metrics.observe(
+            wait_time=max(total_time - compute_time, 0.0), compute_time=compute_time
+        )
+        return result
+
+    async def hash_password(self, password: str) -> bytes:
+        """
+        Асинхронная версия `hashing_encoding.hash_password`.
+
+        Raises:
+            - `HashingQueueFullError`: если очередь пула переполнена
+        """
+        return await self._run(hashing_encoding.hash_password, password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        """
+        Асинхронная версия `hashing_encoding.verify_password`.
+
+        Raises:
+            - `HashingQueueFullError`: если очередь пула переполнена
+        """
+        return await self._run(
+            hashing_encoding.verify_password, password, hashed_password
+        )
+
+
+password_hasher = PasswordHasher(
+    executor=settings.hashing.executor,
+    max_workers=settings.hashing.max_workers,
+    max_queue_depth=settings.hashing.max_queue_depth,
+)
@@ -0,0 +1,77 @@
+"""Кэш проверенных JWT payload, чтобы не проверять подпись токена на каждом запросе"""
+
+import hashlib
+
+from src.config import settings
+from src.security import hashing_encoding
+from src.utils.ttl_cache import TTLCache
+
+
+class JwtPayloadCache:
+    """
+    LRU-кэш проверенных payload по SHA-256 дайджесту токена.
+    Запись живет не дольше `exp` токена и удаляется при отзыве его JTI.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache: TTLCache[bytes, dict] = TTLCache(
+            maxsize=maxsize, ttl=ttl, on_evict=self._on_evict
+        )
+        self._digests_by_jti: dict[str, bytes] = {}
+
+    @staticmethod
+    def _digest(token: str | bytes) -> bytes:
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+        return hashlib.sha256(token).digest()
+
+    def _on_evict(self, digest: bytes, payload: dict) -> None:
+        jti = payload.get("jti")
+        if jti and self._digests_by_jti.get(jti) == digest:
+            del self._digests_by_jti[jti]
+
+    def decode(self, token: str | bytes) -> dict:
+        """
+        Возвращает payload токена. Подпись проверяется только при первом обращении,
+        далее payload берется из кэша до истечения `exp`.
+
+        Raises:
+            - `InvalidTokenError`: если токен недействителен
+        """
+        digest = self._digest(token)
+        if (payload := self._cache.get(digest)) is not None:
+            return payload
+
+        payload = hashing_encoding.decode_jwt(token=token)
+
+        self._cache.set(digest, payload, expires_at=payload.get("exp"))
+        if jti := payload.get("jti"):
+            self._digests_by_jti[jti] = digest
+
+        return payload
+
+    def invalidate_jti(self, jti: str) -> None:
+        """Удаляет из кэша payload токена с указанным JTI"""
+        if digest := self._digests_by_jti.get(jti):
+            self._cache.pop(digest)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def render_prometheus(self) -> str:
+        """Возвращает метрики в текстовом формате Prometheus"""
+        stats = self.stats()
+        return (
+            "# TYPE jwt_payload_cache_size gauge\n"
+            f"jwt_payload_cache_size {stats['size']}\n"
+            "# TYPE jwt_payload_cache_hits_total counter\n"
+            f"jwt_payload_cache_hits_total {stats['hits']}\n"
+            "# TYPE jwt_payload_cache_misses_total counter\n"
+            f"jwt_payload_cache_misses_total {stats['misses']}\n"
+        )
+
+
+payload_cache = JwtPayloadCache(
+    maxsize=settings.security.payload_cache_size,
+    ttl=settings.security.payload_cache_ttl,
+)
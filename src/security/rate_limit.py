@@ -0,0 +1,163 @@
+"""
+Ограничение частоты запросов (GCRA - generic cell rate algorithm).
+
+Лимит `limit` запросов за `period` секунд на ключ (IP-адрес, email, ID пользователя).
+На ключ хранится одно число - теоретическое время прихода следующего запроса (TAT):
+каждый разрешенный запрос сдвигает его на `period / limit`, запрос отклоняется,
+если TAT ушел вперед больше, чем на `period`. В отличие от фиксированного окна
+нет всплеска на границе окон, в отличие от журнала запросов - одна строка на ключ.
+
+Проверка и сдвиг выполняются одним вызовом Lua, время берется из Redis (`TIME`),
+поэтому лимит общий для всех реплик приложения и не зависит от их часов.
+Пока Redis недоступен, тот же алгоритм считается в памяти процесса: лимит
+становится локальным для воркера, но запросы продолжают ограничиваться.
+
+Зависимости выполняются до разбора учетных данных, поэтому отклоненный запрос
+не тратит время на bcrypt и отправку писем:
+```python
+@router.post("/login/", dependencies=[Depends(RateLimit("login:ip", 30, 60, client_ip))])
+```
+"""
+
+import math
+import time
+from typing import Callable, Awaitable
+
+import redis.asyncio as redis
+from fastapi import Request
+
+from src.config import settings
+from src.exceptions import RateLimitExceededError
+from src.utils.ttl_cache import TTLCache
+from src.utils.redis_client import redis_client
+
+# KEYS[1] - TAT ключа в миллисекундах
+# ARGV[1] - интервал между запросами (period / limit), ARGV[2] - период, в миллисекундах
+# Возвращает {allowed, retry_after}: 1 - запрос разрешен, 0 - отклонен;
+#   retry_after - через сколько миллисекунд запрос будет разрешен
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local new_tat = tat + interval
+if new_tat - now > period then
+    return {0, new_tat - period - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+class RateLimiter:
+    """Проверка лимитов в Redis с локальным запасным вариантом"""
+
+    def __init__(self, redis: redis.Redis, local_maxsize: int):
+        self.redis = redis
+        self._gcra = self.redis.register_script(GCRA_SCRIPT)
+        # ключ -> TAT (Unix timestamp в секундах), запись истекает вместе с TAT
+        self._local: TTLCache[str, float] = TTLCache(maxsize=local_maxsize)
+
+    def _hit_local(self, key: str, limit: int, period: int) -> float:
+        now = time.time()
+        interval = period / limit
+        tat = max(self._local.get(key) or now, now)
+        new_tat = tat + interval
+        if new_tat - now > period:
+            return new_tat - period - now
+        self._local.set(key, new_tat, expires_at=new_tat)
+        return 0.0
+
+    async def hit(self, key: str, limit: int, period: int) -> float:
+        """
+        Учитывает запрос по ключу.
+
+        Args:
+            key: Ключ лимита
+            limit: Количество запросов за период
+            period: Период в секундах
+
+        Returns:
+            float: 0, если запрос разрешен, иначе через сколько секунд его можно повторить
+        """
+        try:
+            allowed, retry_after = await self._gcra(
+                keys=[key], args=[max(period * 1000 // limit, 1), period * 1000]
+            )
+        except Exception as e:
+            print(f"Redis error: {e}")
+            return self._hit_local(key, limit, period)
+
+        return 0.0 if int(allowed) else int(retry_after) / 1000
+
+
+rate_limiter = RateLimiter(redis_client.redis, settings.rate_limit.local_maxsize)
+
+
+KeyFunc = Callable[[Request], Awaitable[str | None]]
+
+
+async def client_ip(request: Request) -> str | None:
+    """IP-адрес клиента"""
+    return request.client.host if request.client else None
+
+
+def form_field(name: str) -> KeyFunc:
+    """Значение поля формы (форма уже разобрана FastAPI и закэширована в запросе)"""
+
+    async def key(request: Request) -> str | None:
+        value = (await request.form()).get(name)
+        return value.strip().lower() if isinstance(value, str) and value else None
+
+    return key
+
+
+def body_field(name: str) -> KeyFunc:
+    """Значение поля JSON тела запроса (тело уже прочитано FastAPI)"""
+
+    async def key(request: Request) -> str | None:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        return str(value).strip().lower() if value is not None else None
+
+    return key
+
+
+class RateLimit:
+    """
+    Зависимость FastAPI: не больше `limit` запросов за `period` секунд на ключ.
+    Запросы без ключа (например, без поля в теле) не ограничиваются этим правилом.
+
+    Raises:
+        - `RateLimitExceededError`: лимит исчерпан (429 с заголовком `Retry-After`).
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        limit: int,
+        period: int,
+        key: KeyFunc,
+        limiter: RateLimiter = rate_limiter,
+    ):
+        self.scope = scope
+        self.limit = limit
+        self.period = period
+        self.key = key
+        self.limiter = limiter
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.rate_limit.enabled:
+            return
+        if (key := await self.key(request)) is None:
+            return
+
+        retry_after = await self.limiter.hit(
+            key=f"rate_limit:{self.scope}:{key}", limit=self.limit, period=self.period
+        )
+        if retry_after:
+            raise RateLimitExceededError(retry_after=max(math.ceil(retry_after), 1))
@@ -0,0 +1,223 @@
+"""
+Семейства refresh токенов в Redis.
+
+Семейство - цепочка refresh токенов одного входа. Каждое семейство хранится
+в хеше `refresh_family:<family_id>` с текущим JTI и снимком пользователя,
+TTL ключа равен времени жизни refresh токена.
+
+При обновлении токена текущий JTI атомарно заменяется новым (один вызов Lua).
+Предъявление уже замененного токена означает, что он был украден: семейство
+удаляется целиком, и обе стороны должны войти заново.
+
+Проверка refresh токена не обращается к Postgres.
+
+Все ключи, которые трогают Lua скрипты, передаются в `KEYS`. Ключи семейства и
+пользователя не объединены hash tag, поэтому для Redis Cluster их имена нужно
+дополнить общим тегом (`{<email>}`); хранилище рассчитано на один узел Redis.
+"""
+
+import uuid
+from enum import Enum
+from typing import Sequence
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.entities import UserRole, UserStatus
+from src.schemas.users import UserSnapshot
+from src.utils.redis_client import redis_client
+
+# KEYS[1] - хеш семейства, KEYS[2] - множество семейств пользователя
+# ARGV[1] - family_id, ARGV[2] - JTI, ARGV[3] - TTL,
+# ARGV[4..7] - id, email, role, status пользователя
+START_SCRIPT = """
+redis.call('HSET', KEYS[1],
+    'jti', ARGV[2], 'user_id', ARGV[4], 'email', ARGV[5],
+    'role', ARGV[6], 'status', ARGV[7])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS[1] - хеш семейства, KEYS[2] - множество семейств пользователя
+# ARGV[1] - family_id, ARGV[2] - предъявленный JTI, ARGV[3] - новый JTI, ARGV[4] - TTL
+# Возвращает {status, user_id, email, role, status}:
+#   1 - токен заменен, 0 - семейство не найдено, -1 - повторное использование
+ROTATE_SCRIPT = """
+local family = redis.call('HMGET', KEYS[1], 'jti', 'user_id', 'email', 'role', 'status')
+if not family[1] then
+    return {0}
+end
+if family[1] ~= ARGV[2] then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[1])
+    return {-1}
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return {1, family[2], family[3], family[4], family[5]}
+"""
+
+# KEYS[1] - множество семейств пользователя, KEYS[2..] - хеши семейств
+# ARGV - идентификаторы семейств в том же порядке, что и KEYS[2..]
+# Семейства, добавленные после чтения множества, не затрагиваются
+REVOKE_ALL_SCRIPT = """
+for i = 2, #KEYS do
+    redis.call('DEL', KEYS[i])
+    redis.call('SREM', KEYS[1], ARGV[i - 1])
+end
+return #ARGV
+"""
+
+
+class RotationStatus(Enum):
+    ROTATED = 1
+    """ Токен заменен новым """
+
+    NOT_FOUND = 0
+    """ Семейство истекло или отозвано """
+
+    REUSED = -1
+    """ Предъявлен уже замененный токен, семейство отозвано """
+
+
+class RefreshTokenFamilies:
+    """Хранилище семейств refresh токенов"""
+
+    KEY_PREFIX = "refresh_family:"
+    USER_KEY_PREFIX = "refresh_families:"
+
+    def __init__(self, redis_connection: redis.Redis, ttl: int):
+        self.redis = redis_connection
+        self.ttl = ttl
+
+        self._start = self.redis.register_script(START_SCRIPT)
+        self._rotate = self.redis.register_script(ROTATE_SCRIPT)
+        self._revoke_all = self.redis.register_script(REVOKE_ALL_SCRIPT)
+
+    def _key(self, family_id: str) -> str:
+        return f"{self.KEY_PREFIX}{family_id}"
+
+    def _user_key(self, email: str) -> str:
+        return f"{self.USER_KEY_PREFIX}{email}"
+
+    @staticmethod
+    def new_id() -> str:
+        """Генерирует идентификатор семейства или JTI"""
+        return str(uuid.uuid4())
+
+    async def start(self, user: UserSnapshot, family_id: str, jti: str) -> None:
+        """
+        Создает семейство при входе пользователя.
+
+        Args:
+            - `user`: снимок пользователя, возвращается при обновлении токена
+            - `family_id`: идентификатор семейства
+            - `jti`: JTI первого refresh токена
+        """
+        await self._start(
+            keys=[self._key(family_id), self._user_key(user.email)],
+            args=[
+                family_id,
+                jti,
+                self.ttl,
+                user.id,
+                user.email,
+                user.role.value,
+                user.status.value,
+            ],
+        )
+
+    async def rotate(
+        self, email: str, family_id: str, jti: str, new_jti: str
+    ) -> tuple[RotationStatus, UserSnapshot | None]:
+        """
+        Атомарно заменяет текущий JTI семейства на `new_jti`, если предъявлен текущий.
+
+        Args:
+            - `email`: subject токена
+            - `family_id`: идентификатор семейства из токена
+            - `jti`: JTI предъявленного токена
+            - `new_jti`: JTI нового refresh токена
+
+        Returns:
+            `tuple[RotationStatus, UserSnapshot | None]`: результат и снимок пользователя
+            (только для `RotationStatus.ROTATED`)
+        """
+        result = await self._rotate(
+            keys=[self._key(family_id), self._user_key(email)],
+            args=[family_id, jti, new_jti, self.ttl],
+        )
+
+        rotation_status = RotationStatus(int(result[0]))
+        if rotation_status != RotationStatus.ROTATED:
+            return rotation_status, None
+
+        _, user_id, user_email, role, status = result
+        return rotation_status, UserSnapshot(
+            id=int(user_id),
+            email=user_email,
+            role=UserRole(role),
+            status=UserStatus(status),
+        )
+
+    async def revoke(self, email: str, family_id: str) -> None:
+        """Отзывает одно семейство (выход с текущего устройства)"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(family_id))
+            pipe.srem(self._user_key(email), family_id)
+            await pipe.execute()
+
+    def _revoke_all_call(self, email: str, family_ids: set[str]) -> dict:
+        """Аргументы `REVOKE_ALL_SCRIPT` для семейств, прочитанных из множества"""
+        family_ids = sorted(family_ids)
+        return {
+            "keys": [self._user_key(email), *map(self._key, family_ids)],
+            "args": family_ids,
+        }
+
+    async def revoke_all(self, email: str) -> int:
+        """
+        Отзывает все семейства пользователя (выход со всех устройств, удаление).
+        Множество семейств читается отдельно, чтобы скрипт получил все ключи в `KEYS`.
+
+        Returns:
+            `int`: количество отозванных семейств
+        """
+        family_ids = await self.redis.smembers(self._user_key(email))
+        if not family_ids:
+            return 0
+        return await self._revoke_all(**self._revoke_all_call(email, family_ids))
+
+    async def revoke_all_many(self, emails: Sequence[str]) -> int:
+        """
+        Отзывает все семейства нескольких пользователей (массовое удаление).
+        Множества семейств читаются одним конвейером, вызовы скрипта - другим,
+        оба без транзакции.
+
+        Returns:
+            `int`: количество отозванных семейств
+        """
+        if not emails:
+            return 0
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for email in emails:
+                pipe.smembers(self._user_key(email))
+            families = await pipe.execute()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for email, family_ids in zip(emails, families):
+                if family_ids:
+                    await self._revoke_all(
+                        **self._revoke_all_call(email, family_ids), client=pipe
+                    )
+            return sum(await pipe.execute())
+
+
+refresh_token_families = RefreshTokenFamilies(
+    redis_connection=redis_client.redis,
+    ttl=settings.security.refresh_token_expire_minutes * 60,
+)
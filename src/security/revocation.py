@@ -0,0 +1,374 @@
+"""
+Хранилище отозванных JWT токенов.
+
+Уровни проверки:
+- локальный фильтр Блума: отвечает "точно не отозван" без сетевого запроса
+- Redis: ключи `revoked_jti:<jti>` живут до `exp` токена
+- Postgres: источник истины, используется при пересборке, а также когда фильтр
+  сработал, но Redis недоступен или не знает о токене
+
+Выход со всех устройств не перечисляет токены пользователя: для subject хранится
+отметка `tokens_not_before`, и все токены с `iat` раньше нее недействительны.
+Отметки держатся в памяти (словарь subject -> epoch), в Redis
+(`tokens_not_before:<sub>`) и в Postgres (`users.tokens_not_before`). Если локальная
+отметка не отзывает токен, она сверяется с Redis не чаще раза в `subject_check_ttl`
+секунд - так реплика, пропустившая оповещение, узнает о выходе со всех устройств.
+
+Фильтры и отметки всех реплик синхронизируются через Redis pub/sub.
+"""
+
+import time
+import asyncio
+from typing import Callable, Awaitable
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.database import database
+from src.database.crud import users, blacklisted_tokens
+from src.utils.ttl_cache import TTLCache
+from src.utils.bloom_filter import BloomFilter
+from src.utils.redis_client import redis_client
+from src.security.payload_cache import payload_cache
+
+# сколько ждать сообщение pub/sub за одно чтение, в секундах (меньше `REDIS_SOCKET_TIMEOUT`)
+PUBSUB_POLL_TIMEOUT = 1.0
+
+
+class TokenRevocationStore:
+    """Хранилище отозванных токенов: фильтр Блума + Redis + Postgres"""
+
+    KEY_PREFIX = "revoked_jti:"
+    SUBJECT_KEY_PREFIX = "tokens_not_before:"
+
+    def __init__(
+        self,
+        redis_connection: redis.Redis,
+        session_factory: async_sessionmaker[AsyncSession],
+        channel: str,
+        bloom_capacity: int,
+        bloom_error_rate: float,
+        rebuild_interval: int,
+        retry_interval: int,
+        subject_check_ttl: int,
+        max_token_lifetime: int,
+    ):
+        self.redis = redis_connection
+        self.session_factory = session_factory
+        self.channel = channel
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.rebuild_interval = rebuild_interval
+        self.retry_interval = retry_interval
+        self.max_token_lifetime = max_token_lifetime
+        self.subjects_channel = f"{channel}:subjects"
+
+        self._filter = self._new_filter()
+        # пока фильтр ни разу не загружен из БД, он не может ответить "точно не отозван"
+        self._loaded = False
+        # JTI, добавленные во время пересборки фильтра
+        self._added_during_rebuild: list[str] | None = None
+        # subject -> Unix timestamp, раньше которого токены недействительны
+        self._not_before: dict[str, int] = {}
+        # subject, отметки которых недавно сверялись с Redis
+        self._checked_subjects: TTLCache[str, bool] = TTLCache(
+            maxsize=bloom_capacity, ttl=subject_check_ttl
+        )
+        # пересборки из периодической задачи и после сбоя подписки не должны пересекаться
+        self._rebuild_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+
+    def _new_filter(self) -> BloomFilter:
+        return BloomFilter(
+            capacity=self.bloom_capacity, error_rate=self.bloom_error_rate
+        )
+
+    def _key(self, jti: str) -> str:
+        return f"{self.KEY_PREFIX}{jti}"
+
+    def _subject_key(self, subject: str) -> str:
+        return f"{self.SUBJECT_KEY_PREFIX}{subject}"
+
+    def _set_not_before_local(self, subject: str, not_before: int) -> None:
+        # отметки только растут: старое сообщение не должно откатить новую
+        if not_before > self._not_before.get(subject, 0):
+            self._not_before[subject] = not_before
+
+    def _add_local(self, jti: str) -> None:
+        self._filter.add(jti)
+        payload_cache.invalidate_jti(jti)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append(jti)
+
+    async def start(self) -> None:
+        """Загружает фильтр из БД и запускает синхронизацию"""
+        await self.rebuild()
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._rebuild_periodically()),
+        ]
+
+    async def stop(self) -> None:
+        """Останавливает фоновые задачи"""
+        tasks = [*self._tasks, *self._retries]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _retry_in_background(self, send: Callable[[], Awaitable], until: int) -> None:
+        """
+        Повторяет запись в Redis каждые `retry_interval` секунд до успеха или до `until`.
+        Пока оповещение не дошло, остальные реплики пропускают отозванный токен.
+        """
+
+        async def retry() -> None:
+            while time.time() < until:
+                await asyncio.sleep(self.retry_interval)
+                try:
+                    await send()
+                    return
+                except Exception as e:
+                    print(f"Redis error: {e}")
+
+        task = asyncio.create_task(retry())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _send_revoked(self, jti: str, expires_at: int) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(jti), 1, exat=expires_at)
+            pipe.publish(self.channel, jti)
+            await pipe.execute()
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """
+        Отзывает токен: добавляет его в локальный фильтр, в Redis с TTL до `exp`
+        и оповещает остальные реплики.
+        Запись в Postgres выполняется отдельно (`blacklisted_tokens.add_to_blacklist`).
+
+        Args:
+            - `jti`: идентификатор токена
+            - `expires_at`: время истечения токена в Unix timestamp
+        """
+        self._add_local(jti)
+        try:
+            await self._send_revoked(jti, expires_at)
+        except Exception as e:
+            print(f"Redis error: {e}")
+            self._retry_in_background(
+                lambda: self._send_revoked(jti, expires_at), until=expires_at
+            )
+
+    async def revoke_all(self, subject: str, not_before: int) -> None:
+        """
+        Отзывает все токены subject, выпущенные раньше `not_before`.
+        Одна запись в Redis вместо перечисления токенов; ключ живет
+        не дольше самого долгоживущего токена.
+        Запись в Postgres выполняется отдельно (`users.set_tokens_not_before`).
+
+        Args:
+            - `subject`: значение поля `sub` токенов (email пользователя)
+            - `not_before`: Unix timestamp
+        """
+        self._set_not_before_local(subject, not_before)
+        try:
+            await self._send_not_before(subject, not_before)
+        except Exception as e:
+            print(f"Redis error: {e}")
+            self._retry_in_background(
+                lambda: self._send_not_before(subject, not_before),
+                until=not_before + self.max_token_lifetime,
+            )
+
+    async def _send_not_before(self, subject: str, not_before: int) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._subject_key(subject), not_before, ex=self.max_token_lifetime)
+            pipe.publish(self.subjects_channel, f"{not_before}:{subject}")
+            await pipe.execute()
+
+    def _is_before_local(self, subject: str, issued_at: int) -> bool:
+        not_before = self._not_before.get(subject)
+        return not_before is not None and issued_at < not_before
+
+    async def is_issued_before_revocation(self, subject: str, issued_at: int) -> bool:
+        """
+        Проверяет, выпущен ли токен раньше отметки `tokens_not_before` его subject.
+        Сначала проверяется локальная отметка; если она не отзывает токен, отметка
+        читается из Redis (не чаще раза в `subject_check_ttl` секунд на subject).
+        """
+        if self._is_before_local(subject, issued_at):
+            return True
+        if self._checked_subjects.get(subject):
+            return False
+
+        try:
+            not_before = await self.redis.get(self._subject_key(subject))
+        except Exception as e:
+            print(f"Redis error: {e}")
+            return False
+
+        self._checked_subjects.set(subject, True)
+        if not_before is not None:
+            self._set_not_before_local(subject, int(not_before))
+        return self._is_before_local(subject, issued_at)
+
+    async def is_revoked(self, jti: str, session: AsyncSession | None = None) -> bool:
+        """
+        Проверяет, отозван ли токен.
+        В общем случае (токен не отозван) ответ дает локальный фильтр без сетевых запросов.
+        Пока фильтр не загружен из БД, каждый токен проверяется в Redis и Postgres.
+
+        Args:
+            - `jti`: идентификатор токена
+            - `session`: сессия запроса, используется, если Redis недоступен
+              или не подтвердил срабатывание фильтра
+        """
+        if self._loaded and jti not in self._filter:
+            return False
+
+        try:
+            if await self.redis.exists(self._key(jti)) > 0:
+                return True
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+        # Redis недоступен или не знает о токене: запись в Redis могла не пройти,
+        # ключ мог быть вытеснен или потерян при перезапуске - проверяем в БД.
+        # Сюда доходят только срабатывания фильтра, так что запросов к БД немного
+        if session is not None:
+            return await blacklisted_tokens.is_token_blacklisted(
+                session=session, jti=jti
+            )
+
+        async with self.session_factory() as session:
+            return await blacklisted_tokens.is_token_blacklisted(
+                session=session, jti=jti
+            )
+
+    async def rebuild(self) -> None:
+        """
+        Пересобирает фильтр из БД и восстанавливает ключи в Redis.
+        Истекшие токены при этом выпадают из фильтра.
+        Одновременно выполняется только одна пересборка.
+        """
+        async with self._rebuild_lock:
+            await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        self._added_during_rebuild = []
+        try:
+            async with self.session_factory() as session:
+                rows = await blacklisted_tokens.get_active_blacklisted_tokens(
+                    session=session
+                )
+                # отметки старше самого долгоживущего токена уже ничего не отзывают
+                subjects = await users.get_tokens_not_before(
+                    session=session, since=int(time.time()) - self.max_token_lifetime
+                )
+        except Exception as e:
+            print(f"Revocation store rebuild error: {e}")
+            self._added_during_rebuild = None
+            return
+
+        new_filter = self._new_filter()
+        for jti, _ in rows:
+            new_filter.add(jti)
+        for jti in self._added_during_rebuild:
+            new_filter.add(jti)
+
+        self._filter = new_filter
+        self._added_during_rebuild = None
+        self._loaded = True
+
+        not_before = dict(subjects)
+        # отметки, полученные во время чтения из БД, не теряем
+        for subject, epoch in self._not_before.items():
+            if epoch > not_before.get(subject, 0):
+                not_before[subject] = epoch
+        self._not_before = {
+            subject: epoch
+            for subject, epoch in not_before.items()
+            if epoch > time.time() - self.max_token_lifetime
+        }
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for jti, expires_at in rows:
+                    pipe.set(self._key(jti), 1, exat=expires_at)
+                for subject, epoch in subjects:
+                    pipe.set(
+                        self._subject_key(subject),
+                        epoch,
+                        exat=epoch + self.max_token_lifetime,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            print(f"Redis error: {e}")
+
+        print(
+            f"Revocation store rebuilt: {len(rows)} tokens, "
+            f"{len(self._not_before)} subjects "
+            f"at {datetime.now(timezone.utc).isoformat()}"
+        )
+
+    async def _rebuild_periodically(self) -> None:
+        while True:
+            # неудачная загрузка при старте повторяется скоро, а не через полный период
+            await asyncio.sleep(
+                self.rebuild_interval if self._loaded else self.retry_interval
+            )
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Revocation store rebuild error: {e}")
+
+    async def _listen(self) -> None:
+        """Получает JTI и отметки subject, отозванные на других репликах"""
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel, self.subjects_channel)
+                    while True:
+                        # в redis-py 5.x `listen()` обрывается по `socket_timeout`, если
+                        # сообщений нет; явный таймаут чтения меньше него просто вернет None
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=PUBSUB_POLL_TIMEOUT
+                        )
+                        if message is None:
+                            continue
+                        if message["channel"] == self.subjects_channel:
+                            not_before, subject = message["data"].split(":", 1)
+                            self._set_not_before_local(subject, int(not_before))
+                        else:
+                            self._add_local(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Revocation listener error: {e}")
+                await asyncio.sleep(1)
+                try:
+                    # пока подписка не работала, сообщения могли потеряться
+                    await self.rebuild()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Revocation store rebuild error: {e}")
+
+
+revocation_store = TokenRevocationStore(
+    redis_connection=redis_client.redis,
+    session_factory=database.session_factory,
+    channel=settings.revocation.channel,
+    bloom_capacity=settings.revocation.bloom_capacity,
+    bloom_error_rate=settings.revocation.bloom_error_rate,
+    rebuild_interval=settings.revocation.rebuild_interval,
+    retry_interval=settings.revocation.retry_interval,
+    subject_check_ttl=settings.revocation.subject_check_ttl,
+    max_token_lifetime=settings.security.refresh_token_expire_minutes * 60,
+)
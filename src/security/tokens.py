@@ -4,12 +4,16 @@ from datetime import datetime, timezone
 
 import src.security.hashing_encoding as jwt_utils
 from src.config import settings
+from src.schemas.users import UserSnapshot
 from src.database.tables import User
 
 TOKEN_SUBJECT_FIELD = "sub"
 TOKEN_ROLE_FIELD = "role"
 TOKEN_TYPE_FIELD = "type"
 TOKEN_ID_FIELD = "jti"
+TOKEN_FAMILY_FIELD = "fam"
+TOKEN_DEVICE_FIELD = "did"
+TOKEN_SESSION_FIELD = "sid"
 
 
 class TokenType(Enum):
@@ -17,13 +21,22 @@ class TokenType(Enum):
     REFRESH_TOKEN_TYPE = "refresh"
 
 
-def create_token(user: User, token_type: TokenType) -> str:
+def create_token(
+    user: User | UserSnapshot,
+    token_type: TokenType,
+    jti: str | None = None,
+    family_id: str | None = None,
+    device_id: str | None = None,
+    session_id: str | None = None,
+) -> str:
     """
     Создает JWT токен и добавляет в него:
     - sub (subject) - информацию о пользователе
     - role - информацию о роли пользователя
     - type - информацию о типе токена
     - jti (JSON web token identifier) - уникальный идентификатор токена
+    - fam (family) - идентификатор семейства refresh токенов (если передан)
+    - did, sid - идентификаторы устройства и сессии устройства (если переданы)
     - exp (expire) - время истечения токена
     - iat (issued_at) - время создания токена
 
@@ -34,6 +47,9 @@ def create_token(user: User, token_type: TokenType) -> str:
         "role": "ADMIN",
         "type": "access",
         "jti": "unique-token-id",
+        "fam": "refresh-token-family-id",
+        "did": "device-id",
+        "sid": "device-session-id",
         "exp": <timestamp>,
         "iat": <timestamp>
     }
@@ -42,19 +58,29 @@ def create_token(user: User, token_type: TokenType) -> str:
     Args:
         - `user`: пользователь
         - `token_type`: тип токена
+        - `jti`: идентификатор токена (по умолчанию генерируется)
+        - `family_id`: идентификатор семейства refresh токенов
+        - `device_id`: идентификатор устройства
+        - `session_id`: идентификатор сессии устройства
 
     Returns:
         `str`: JWT токен
     """
     # Генерируем уникальный идентификатор для токена
-    jti = str(uuid.uuid4())
+    jti = jti or str(uuid.uuid4())
 
     jwt_payload = {
         TOKEN_SUBJECT_FIELD: user.email,
-        TOKEN_ROLE_FIELD: user.role,
+        TOKEN_ROLE_FIELD: user.role.value,
         TOKEN_TYPE_FIELD: token_type.value,
         TOKEN_ID_FIELD: jti,
     }
+    if family_id:
+        jwt_payload[TOKEN_FAMILY_FIELD] = family_id
+    if device_id:
+        jwt_payload[TOKEN_DEVICE_FIELD] = device_id
+    if session_id:
+        jwt_payload[TOKEN_SESSION_FIELD] = session_id
 
     match token_type:
         case TokenType.ACCESS_TOKEN_TYPE:
@@ -0,0 +1,146 @@
+"""
+Фоновая очистка истекших токенов из черного списка.
+
+Таблица секционирована по дням (`src/database/partitions.py`). За один проход:
+- создаются партиции на время жизни refresh токена вперед
+- удаляются партиции, все токены которых истекли
+- порциями удаляются истекшие строки из партиции по умолчанию
+
+Запускается в жизненном цикле приложения или отдельно (например, по cron):
+```shell
+uv run python -m src.tasks.blacklist_reaper
+```
+"""
+
+import math
+import time
+import asyncio
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, AsyncConnection
+
+from src.config import settings
+from src.database import database
+from src.database.crud import blacklisted_tokens
+from src.database.partitions import DailyPartitions, blacklisted_tokens_partitions
+
+# ключ advisory lock, по которому реплики договариваются, кто выполняет очистку
+REAPER_LOCK_KEY = 7_260_001
+
+
+class BlacklistReaper:
+    """Удаляет истекшие токены порциями; одновременно работает только на одной реплике"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval: int,
+        batch_size: int,
+        partitions: DailyPartitions,
+        days_ahead: int,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.batch_size = batch_size
+        self.partitions = partitions
+        self.days_ahead = days_ahead
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self) -> int | None:
+        """
+        Выполняет один проход очистки.
+
+        Returns:
+            `int | None`: количество построчно удаленных записей или None,
+            если очистку сейчас выполняет другая реплика
+        """
+        # advisory lock уровня сессии живет, пока открыто это соединение
+        async with self.engine.connect() as conn:
+            locked = await conn.scalar(
+                select(func.pg_try_advisory_lock(REAPER_LOCK_KEY))
+            )
+            await conn.commit()
+            if not locked:
+                return None
+
+            try:
+                total, started = 0, time.perf_counter()
+                now = int(time.time())
+                created = await self.partitions.ensure(conn, now, self.days_ahead)
+                dropped = await self.partitions.drop_expired(conn, now)
+
+                async with AsyncSession(bind=conn) as session:
+                    while True:
+                        deleted = await blacklisted_tokens.cleanup_expired_tokens(
+                            session=session, batch_size=self.batch_size
+                        )
+                        total += deleted
+                        if deleted < self.batch_size:
+                            break
+
+                elapsed = time.perf_counter() - started
+                print(
+                    f"Blacklist reaper: created {len(created)} partitions, "
+                    f"dropped {len(dropped)} partitions {dropped}, "
+                    f"deleted {total} rows in {elapsed:.2f}s "
+                    f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+                )
+                return total
+            finally:
+                await self._unlock(conn)
+
+    @staticmethod
+    async def _unlock(conn: AsyncConnection) -> None:
+        """
+        Снимает advisory lock. Если после ошибки транзакция прервана, сначала
+        откатывает ее - иначе `pg_advisory_unlock` тоже упадет и скроет исходную ошибку.
+        Если снять блокировку не удалось, соединение не возвращается в пул: блокировка
+        уровня сессии освободится вместе с ним.
+        """
+        try:
+            await conn.rollback()
+            await conn.execute(select(func.pg_advisory_unlock(REAPER_LOCK_KEY)))
+            await conn.commit()
+        except Exception as e:
+            print(f"Blacklist reaper unlock error: {e}")
+            await conn.invalidate()
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Blacklist reaper error: {e}")
+            await asyncio.sleep(self.interval)
+
+
+blacklist_reaper = BlacklistReaper(
+    engine=database.engine,
+    interval=settings.revocation.cleanup_interval,
+    batch_size=settings.revocation.cleanup_batch_size,
+    partitions=blacklisted_tokens_partitions,
+    # токен попадает в черный список не позже, чем истекает refresh токен
+    days_ahead=math.ceil(settings.security.refresh_token_expire_minutes / (24 * 60)),
+)
+
+
+if __name__ == "__main__":
+
+    async def main():
+        await blacklist_reaper.run_once()
+        await database.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Отметки последней активности устройств и их сессий.
+
+Авторизованный запрос только записывает время в словарь в памяти (без обращения к БД).
+Фоновая задача раз в `DEVICES_FLUSH_INTERVAL` секунд записывает накопленные отметки
+пачками `UPDATE ... FROM (VALUES ...)`: сколько бы запросов ни пришло с устройства,
+за период это одна строка в одном запросе. При остановке приложения остаток
+записывается сразу; при аварийном завершении теряется не больше одного периода.
+"""
+
+import time
+import asyncio
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.database import database
+from src.database.crud import devices
+from src.database.tables import Device, DeviceSession
+
+
+class DeviceActivityTracker:
+    """Накапливает отметки активности в памяти и периодически записывает их в БД"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: int,
+        batch_size: int,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._devices: dict[str, int] = {}
+        self._sessions: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def touch(self, device_id: str | None, session_id: str | None) -> None:
+        """Отмечает активность устройства и сессии (идентификаторы из токена)"""
+        now = int(time.time())
+        if device_id:
+            self._devices[device_id] = now
+        if session_id:
+            self._sessions[session_id] = now
+
+    @staticmethod
+    def _merge(target: dict[str, int], pending: dict[str, int]) -> None:
+        for key, timestamp in pending.items():
+            if timestamp > target.get(key, 0):
+                target[key] = timestamp
+
+    @staticmethod
+    def _to_uuid(pending: dict[str, int]) -> dict[UUID, int]:
+        return {UUID(key): timestamp for key, timestamp in pending.items()}
+
+    async def flush(self) -> tuple[int, int]:
+        """
+        Записывает накопленные отметки.
+
+        Returns:
+            `tuple[int, int]`: количество обновленных устройств и сессий
+        """
+        pending_devices, self._devices = self._devices, {}
+        pending_sessions, self._sessions = self._sessions, {}
+        if not pending_devices and not pending_sessions:
+            return 0, 0
+
+        try:
+            async with self.session_factory() as session:
+                updated_devices = await devices.update_last_seen(
+                    session=session,
+                    model=Device,
+                    last_seen=self._to_uuid(pending_devices),
+                    batch_size=self.batch_size,
+                )
+                updated_sessions = await devices.update_last_seen(
+                    session=session,
+                    model=DeviceSession,
+                    last_seen=self._to_uuid(pending_sessions),
+                    batch_size=self.batch_size,
+                )
+        except Exception:
+            # вернуть отметки, чтобы записать их при следующем проходе
+            self._merge(self._devices, pending_devices)
+            self._merge(self._sessions, pending_sessions)
+            raise
+        return updated_devices, updated_sessions
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Device activity flush error: {e}")
+
+    async def _run_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                started = time.perf_counter()
+                updated_devices, updated_sessions = await self.flush()
+                if updated_devices or updated_sessions:
+                    print(
+                        f"Device activity: updated {updated_devices} devices, "
+                        f"{updated_sessions} sessions in "
+                        f"{time.perf_counter() - started:.3f}s"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Device activity flush error: {e}")
+
+
+device_activity = DeviceActivityTracker(
+    session_factory=database.session_factory,
+    interval=settings.devices.flush_interval,
+    batch_size=settings.devices.flush_batch_size,
+)
@@ -0,0 +1,357 @@
+"""
+Очередь писем в Redis Streams.
+
+HTTP-запрос только добавляет письмо в поток `EMAIL_OUTBOX_STREAM` (один `XADD`),
+а отправляет его отдельный воркер, поэтому время ответа не зависит от SMTP-сервера.
+
+- воркеры читают поток через группу потребителей: каждое письмо получает один воркер,
+  письмо, взятое упавшим воркером, через `EMAIL_OUTBOX_CLAIM_IDLE` секунд забирает другой
+- неудачная отправка откладывается в `<поток>:retry` (sorted set, score - время следующей
+  попытки) с экспоненциальной задержкой и возвращается в поток, когда подойдет время
+- после `EMAIL_OUTBOX_MAX_ATTEMPTS` попыток (или если письмо устарело) оно переносится
+  в поток недоставленных `<поток>:dead` с причиной в поле `reason`; туда же попадает
+  письмо, которое забирали у упавших воркеров больше `EMAIL_OUTBOX_MAX_ATTEMPTS` раз
+- воркер периодически пишет в лог отставание очереди
+
+Запуск воркера отдельным процессом (воркеров может быть несколько):
+```shell
+uv run python -m src.tasks.email_outbox
+```
+"""
+
+import os
+import time
+import uuid
+import random
+import signal
+import socket
+import asyncio
+from typing import Any, Callable, Awaitable
+
+import orjson
+import redis.asyncio as redis
+from redis.exceptions import ResponseError
+
+from src.config import EmailOutboxSettings, settings
+from src.utils.emails import smtp_pool, send_verification_code
+from src.utils.redis_client import RedisClient, redis_client
+
+# KEYS[1] - отложенные письма, KEYS[2] - поток
+# ARGV[1] - текущее время в миллисекундах, ARGV[2] - максимум писем, ARGV[3] - MAXLEN потока
+# Возвращает количество возвращенных в поток писем
+REQUEUE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, message in ipairs(due) do
+    redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[3], '*', 'message', message)
+    redis.call('ZREM', KEYS[1], message)
+end
+return #due
+"""
+
+# вид письма -> функция отправки; при неудаче выбрасывает исключение,
+# его текст попадает в поле `reason` недоставленного письма
+EMAIL_SENDERS: dict[str, Callable[[str, dict], Awaitable[None]]] = {
+    "verification": lambda to, data: send_verification_code(to, data["code"]),
+}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _entry_time_ms(entry_id: str) -> int:
+    """Время добавления записи в поток из ее ID `<ms>-<seq>`"""
+    return int(entry_id.split("-", 1)[0])
+
+
+class EmailOutbox:
+    """Очередь писем: добавление из приложения и отправка воркером"""
+
+    def __init__(self, client: RedisClient, outbox_settings: EmailOutboxSettings):
+        self.client = client
+        self.redis: redis.Redis = client.redis
+        self.settings = outbox_settings
+        self.stream = outbox_settings.stream
+        self.retry_key = f"{outbox_settings.stream}:retry"
+        self.dead_stream = f"{outbox_settings.stream}:dead"
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._requeue_due = self.redis.register_script(REQUEUE_DUE_SCRIPT)
+        self._task: asyncio.Task | None = None
+
+    async def enqueue(
+        self, kind: str, to: str, data: dict[str, Any], ttl: int | None = None
+    ) -> str | None:
+        """
+        Добавляет письмо в очередь.
+
+        Args:
+            kind: Вид письма (ключ `EMAIL_SENDERS`)
+            to: Адрес получателя
+            data: Данные для шаблона письма
+            ttl: Через сколько секунд письмо теряет смысл и не отправляется
+
+        Returns:
+            str | None: ID записи в потоке или None, если Redis недоступен
+        """
+        message = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "to": to,
+            "data": data,
+            "attempt": 0,
+            "deadline": _now_ms() + ttl * 1000 if ttl else None,
+        }
+        try:
+            return await self.redis.xadd(
+                self.stream,
+                {"message": orjson.dumps(message)},
+                maxlen=self.settings.maxlen,
+                approximate=True,
+            )
+        except Exception as e:
+            print(f"Redis error: {e}")
+            return None
+
+    async def ensure_group(self) -> None:
+        """Создает поток и группу потребителей, если их еще нет"""
+        try:
+            await self.redis.xgroup_create(
+                self.stream, self.settings.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повторной попыткой в секундах (с разбросом, чтобы не было залпов)"""
+        delay = min(
+            self.settings.backoff_base * 2 ** (attempt - 1), self.settings.backoff_max
+        )
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _dead_letter(self, entry_id: str, message: dict, reason: str) -> None:
+        print(f"Email outbox: message {message['id']} dead-lettered: {reason}")
+        async with self.client.pipeline() as pipe:
+            pipe.xadd(
+                self.dead_stream,
+                {"message": orjson.dumps(message), "reason": reason},
+                maxlen=self.settings.dead_maxlen,
+                approximate=True,
+            )
+            pipe.xack(self.stream, self.settings.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+
+    async def _deliver(
+        self, entry_id: str, fields: dict[str, str], deliveries: int = 1
+    ) -> bool:
+        """
+        Отправляет одно письмо. Запись удаляется из потока в любом случае:
+        письмо отправлено, отложено для повтора или перенесено в недоставленные.
+
+        Args:
+            entry_id: ID записи в потоке
+            fields: Поля записи
+            deliveries: Сколько раз запись выдавалась воркерам (из `XPENDING`)
+        """
+        try:
+            message = orjson.loads(fields["message"])
+        except (KeyError, orjson.JSONDecodeError):
+            await self._dead_letter(entry_id, {"id": None, "raw": fields}, "malformed")
+            return False
+
+        # запись, которую снова и снова забирают у зависших воркеров, скорее всего
+        # роняет воркер - без этой проверки она забиралась бы бесконечно
+        if deliveries > self.settings.max_attempts:
+            await self._dead_letter(
+                entry_id, message, f"not acknowledged after {deliveries} deliveries"
+            )
+            return False
+        if message["deadline"] and _now_ms() > message["deadline"]:
+            await self._dead_letter(entry_id, message, "expired")
+            return False
+        if (sender := EMAIL_SENDERS.get(message["kind"])) is None:
+            await self._dead_letter(entry_id, message, f"unknown kind {message['kind']}")
+            return False
+
+        try:
+            await sender(message["to"], message["data"])
+            sent, error = True, None
+        except Exception as e:
+            sent, error = False, f"{type(e).__name__}: {e}"
+            print(f"Email outbox: message {message['id']} not sent: {error}")
+
+        if sent:
+            async with self.client.pipeline() as pipe:
+                pipe.xack(self.stream, self.settings.group, entry_id)
+                pipe.xdel(self.stream, entry_id)
+            return True
+
+        message["attempt"] += 1
+        if message["attempt"] >= self.settings.max_attempts:
+            await self._dead_letter(entry_id, message, error)
+            return False
+
+        retry_at = _now_ms() + int(self.backoff(message["attempt"]) * 1000)
+        async with self.client.pipeline() as pipe:
+            pipe.zadd(self.retry_key, {orjson.dumps(message): retry_at})
+            pipe.xack(self.stream, self.settings.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
+        return False
+
+    async def process_batch(self, block_ms: int | None = None) -> int:
+        """
+        Возвращает в поток отложенные письма, у которых подошло время, забирает письма
+        зависших воркеров, читает новые и отправляет их одновременно.
+
+        Returns:
+            int: количество обработанных писем
+        """
+        await self._requeue_due(
+            keys=[self.retry_key, self.stream],
+            args=[_now_ms(), self.settings.batch_size, self.settings.maxlen],
+        )
+
+        claimed = await self.redis.xautoclaim(
+            self.stream,
+            self.settings.group,
+            self.consumer,
+            min_idle_time=self.settings.claim_idle * 1000,
+            start_id="0-0",
+            count=self.settings.batch_size,
+        )
+        entries = claimed[1]
+        deliveries = await self._delivery_counts([entry_id for entry_id, _ in entries])
+        if len(entries) < self.settings.batch_size:
+            response = await self.redis.xreadgroup(
+                self.settings.group,
+                self.consumer,
+                {self.stream: ">"},
+                count=self.settings.batch_size - len(entries),
+                # забранные письма нужно отправить сразу, не дожидаясь новых
+                block=None if entries else block_ms,
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        # записи, удаленные из потока до отправки, приходят без полей
+        if deleted := [entry_id for entry_id, fields in entries if not fields]:
+            await self.redis.xack(self.stream, self.settings.group, *deleted)
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        await asyncio.gather(
+            *(
+                self._deliver(entry_id, fields, deliveries.get(entry_id, 1))
+                for entry_id, fields in entries
+            )
+        )
+        return len(entries)
+
+    async def _delivery_counts(self, entry_ids: list[str]) -> dict[str, int]:
+        """Сколько раз забранные записи выдавались воркерам, по `XPENDING` каждой записи"""
+        if not entry_ids:
+            return {}
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for entry_id in entry_ids:
+                pipe.xpending_range(
+                    self.stream, self.settings.group, min=entry_id, max=entry_id, count=1
+                )
+        return {
+            pending[0]["message_id"]: pending[0]["times_delivered"]
+            for pending in pipe.results
+            if pending
+        }
+
+    async def stats(self) -> dict[str, int | float]:
+        """
+        Состояние очереди:
+        - `lag`: письма, еще не выданные ни одному воркеру
+        - `pending`: выданные, но еще не обработанные
+        - `oldest_age`: сколько секунд ждет самое старое необработанное письмо
+        - `retry`: отложенные для повторной попытки
+        - `dead`: недоставленные
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xinfo_groups(self.stream)
+            pipe.xlen(self.stream)
+            pipe.zcard(self.retry_key)
+            pipe.xlen(self.dead_stream)
+        groups, length, retry, dead = pipe.results
+
+        group = next((g for g in groups if g["name"] == self.settings.group), None)
+        pending = group["pending"] if group else 0
+
+        # обработанные записи удаляются из потока, поэтому в нем остаются
+        # только выданные воркерам и еще не выданные
+        oldest = []
+        if pending:
+            summary = await self.redis.xpending(self.stream, self.settings.group)
+            oldest.append(_entry_time_ms(summary["min"]))
+        undelivered = await self.redis.xrange(
+            self.stream,
+            min=f"({group['last-delivered-id']}" if group else "-",
+            count=1,
+        )
+        if undelivered:
+            oldest.append(_entry_time_ms(undelivered[0][0]))
+
+        return {
+            "lag": max(length - pending, 0),
+            "pending": pending,
+            "oldest_age": (_now_ms() - min(oldest)) / 1000 if oldest else 0.0,
+            "retry": retry,
+            "dead": dead,
+        }
+
+    async def run(self) -> None:
+        """Обрабатывает очередь, пока задачу не отменят"""
+        await self.ensure_group()
+        print(f"Email outbox: worker {self.consumer} started")
+        reported_at = 0.0
+
+        while True:
+            try:
+                await self.process_batch(block_ms=self.settings.block_ms)
+
+                if time.monotonic() - reported_at >= self.settings.lag_report_interval:
+                    reported_at = time.monotonic()
+                    stats = await self.stats()
+                    print(
+                        f"Email outbox: lag {stats['lag']}, pending {stats['pending']}, "
+                        f"oldest {stats['oldest_age']:.1f}s, retry {stats['retry']}, "
+                        f"dead {stats['dead']}"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Email outbox error: {e}")
+                await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+email_outbox = EmailOutbox(redis_client, settings.email_outbox)
+
+
+if __name__ == "__main__":
+
+    async def main():
+        smtp_pool.start()
+        task = asyncio.create_task(email_outbox.run())
+        # письма в работе не теряются: необработанные заберет другой воркер
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, task.cancel)
+        await asyncio.gather(task, return_exceptions=True)
+        await smtp_pool.close()
+        await redis_client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import math
+import hashlib
+
+
+class BloomFilter:
+    """
+    Фильтр Блума: вероятностное множество без ложноотрицательных ответов.
+
+    Если `item not in bloom`, элемента точно нет в множестве.
+    Если `item in bloom`, элемент есть с вероятностью `1 - error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("capacity должен быть больше нуля")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate должен быть в интервале (0, 1)")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # оптимальный размер битового массива и количество хэш-функций
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Количество добавленных элементов (с учетом повторов)"""
+        return self._count
+
+    def _positions(self, item: str) -> list[int]:
+        # двойное хэширование: h1 + i * h2 (Kirsch–Mitzenmacher)
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
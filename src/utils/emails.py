@@ -1,4 +1,9 @@
 import os
+import time
+import asyncio
+from typing import Any, AsyncIterator
+from contextlib import asynccontextmanager
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -8,12 +13,179 @@ from jinja2 import Environment, FileSystemLoader
 from src.config import settings
 
 # Определяем публичный API модуля
-__all__ = ["send_verification_code"]
+__all__ = ["SMTPPool", "send_verification_code", "smtp_pool"]
 
 
 template_dir = settings.mail.templates_path
 
 
+# ошибки, после которых соединение больше не используется, а отправка повторяется
+# через новое соединение (как и после ответа 421 - сервер закрывает соединение)
+RECONNECT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+)
+
+
+class SMTPPool:
+    """
+    Пул авторизованных SMTP соединений.
+
+    Соединение (TCP, TLS и AUTH) устанавливается один раз и используется для следующих
+    писем, пока не простоит дольше `idle_timeout` секунд. Одновременно открыто не больше
+    `max_size` соединений, остальные отправки ждут свободное. Простаивающие соединения
+    раз в `keepalive_interval` секунд проверяются командой NOOP, чтобы сервер
+    их не закрыл; соединение, которое сервер все же закрыл, заменяется новым.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_timeout: float,
+        keepalive_interval: float,
+        **smtp_kwargs: Any,
+    ):
+        """
+        Args:
+            - `max_size`: максимальное количество соединений
+            - `idle_timeout`: через сколько секунд простоя соединение закрывается
+            - `keepalive_interval`: период проверки простаивающих соединений в секундах
+            - `smtp_kwargs`: параметры `aiosmtplib.SMTP` (адрес, учетные данные, TLS)
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.smtp_kwargs = smtp_kwargs
+
+        self.connects = 0
+        """ Сколько раз устанавливалось соединение """
+
+        # свободные соединения и время их последнего использования (time.monotonic)
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._slots = asyncio.Semaphore(max_size)
+        self._task: asyncio.Task | None = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(**self.smtp_kwargs)
+        # при переданных учетных данных connect() сразу выполняет AUTH
+        await client.connect()
+        self.connects += 1
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    @asynccontextmanager
+    async def connection(self, fresh: bool = False) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Выдает соединение в монопольное пользование. Если в блоке произошла ошибка,
+        соединение закрывается, иначе возвращается в пул.
+
+        Args:
+            - `fresh`: установить новое соединение, не используя свободные
+        """
+        async with self._slots:
+            client = None
+            while self._idle and not fresh:
+                # последнее вернувшееся соединение - самое свежее
+                candidate, last_used = self._idle.pop()
+                fresh = time.monotonic() - last_used < self.idle_timeout
+                if fresh and candidate.is_connected:
+                    client = candidate
+                    break
+                await self._close(candidate)
+            if client is None:
+                client = await self._connect()
+
+            try:
+                yield client
+            except BaseException:
+                await self._close(client)
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    async def send_message(self, message: Message) -> None:
+        """
+        Отправляет письмо через соединение из пула. Если соединение оказалось
+        закрытым сервером, письмо один раз отправляется через новое соединение
+        (остальные свободные соединения, скорее всего, тоже закрыты).
+        """
+        for attempt in range(2):
+            try:
+                async with self.connection(fresh=bool(attempt)) as client:
+                    await client.send_message(message)
+                    return
+            except RECONNECT_ERRORS:
+                if attempt:
+                    raise
+            except aiosmtplib.SMTPResponseError as e:
+                if attempt or e.code != 421:
+                    raise
+
+    async def keepalive(self) -> None:
+        """Закрывает соединения, простоявшие дольше `idle_timeout`, остальные проверяет NOOP"""
+        now = time.monotonic()
+        for item in list(self._idle):
+            # проверяемое соединение занимает место в пуле, как выданное отправке
+            async with self._slots:
+                if item not in self._idle:
+                    # уже выдано отправке
+                    continue
+                self._idle.remove(item)
+                client, last_used = item
+                if now - last_used >= self.idle_timeout:
+                    await self._close(client)
+                    continue
+                try:
+                    await client.noop()
+                except Exception:
+                    client.close()
+                    continue
+                # NOOP не считается использованием: время простоя не сбрасывается
+                self._idle.insert(0, item)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def close(self) -> None:
+        """Останавливает проверку соединений и закрывает свободные соединения"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._close(client) for client, _ in idle))
+
+    async def _run_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await self.keepalive()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"SMTP keepalive error: {e}")
+
+
+smtp_pool = SMTPPool(
+    max_size=settings.mail.pool_max_size,
+    idle_timeout=settings.mail.pool_idle_timeout,
+    keepalive_interval=settings.mail.pool_keepalive_interval,
+    hostname=settings.mail.hostname,
+    port=settings.mail.port,
+    username=settings.mail.sender,
+    password=settings.mail.password,
+    use_tls=True,
+    timeout=settings.mail.timeout,
+)
+
+
 def render_html(filename: str, **template_args) -> str:
     """
     Рендерит HTML-шаблон с заданными аргументами.
@@ -51,7 +223,13 @@ def get_logo(css_class_to_add: str | None) -> str:
     return logo_svg
 
 
-async def send_verification_code(to_email: str, code: str) -> bool:
+async def send_verification_code(to_email: str, code: str) -> None:
+    """
+    Отправляет письмо с кодом подтверждения через пул SMTP соединений.
+
+    Raises:
+        - `aiosmtplib.SMTPException`, `OSError`: если письмо не отправлено
+    """
     # Настройка Jinja2
     html_content = render_html(
         filename="verification.html",
@@ -73,17 +251,6 @@ async def send_verification_code(to_email: str, code: str) -> bool:
     alt.attach(MIMEText(html_content, "html", "utf-8"))
     message.attach(alt)
 
-    try:
-        async with aiosmtplib.SMTP(
-            hostname=settings.mail.hostname,
-            port=settings.mail.port,
-            username=settings.mail.sender,
-            password=settings.mail.password,
-            use_tls=True,
-        ) as client:
-            await client.send_message(message)
-            print("email успешно отправлен")
-            return True
-    except Exception as e:
-        print(f"SMTP error: {e}")
-        return False
+    # ошибку обрабатывает очередь писем: повторяет отправку и записывает причину
+    await smtp_pool.send_message(message)
+    print("email успешно отправлен")
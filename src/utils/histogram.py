@@ -0,0 +1,53 @@
+import bisect
+from typing import Sequence
+
+# границы корзин в секундах (как у Prometheus по умолчанию, с добавлением 1 мс)
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами для метрик задержек.
+    Наблюдение - O(log количества корзин), память не зависит от количества наблюдений.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # последняя корзина - всё, что больше верхней границы (+Inf)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Возвращает накопленные счетчики по верхним границам корзин (`le`)"""
+        result, total = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative()),
+        }
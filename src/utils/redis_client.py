@@ -1,28 +1,122 @@
-import redis.asyncio as redis
+import asyncio
+from enum import Enum
+from typing import NamedTuple, AsyncIterator
+from contextlib import asynccontextmanager
 
-from src.config import settings
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+
+from src.config import RedisSettings, settings
+
+# KEYS[1] - код верификации, KEYS[2] - счетчик неудачных попыток
+# ARGV[1] - предъявленный код, ARGV[2] - максимальное количество попыток
+# Возвращает {status, attempts}: 1 - код верный (удален), 0 - кода нет или он истек,
+#   -1 - код неверный, -2 - неверный и попытки исчерпаны (код удален)
+VERIFY_CODE_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return {0, 0}
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return {1, 0}
+end
+local attempts = redis.call('INCR', KEYS[2])
+if attempts == 1 then
+    redis.call('PEXPIRE', KEYS[2], math.max(redis.call('PTTL', KEYS[1]), 1))
+end
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return {-2, attempts}
+end
+return {-1, attempts}
+"""
+
+
+class VerificationStatus(Enum):
+    VERIFIED = 1
+    """ Код верный, использованный код удален """
+
+    NOT_FOUND = 0
+    """ Код не запрашивался, истек или уже использован """
+
+    INVALID = -1
+    """ Код неверный """
+
+    ATTEMPTS_EXCEEDED = -2
+    """ Код неверный и попытки исчерпаны, код удален """
+
+    UNAVAILABLE = -3
+    """ Redis недоступен """
+
+
+class VerificationResult(NamedTuple):
+    status: VerificationStatus
+    attempts_left: int
+    """ Сколько неверных попыток осталось до удаления кода """
 
 
 class RedisClient:
-    """Клиент для работы с Redis"""
-
-    def __init__(self):
-        redis_kwargs = {
-            "host": settings.redis.host,
-            "port": settings.redis.port,
-            "db": settings.redis.db,
-            "decode_responses": True,
-        }
+    """
+    Клиент для работы с Redis.
+
+    Все компоненты приложения используют одно подключение `redis_client.redis`
+    с общим пулом соединений. Пул ограничен `max_connections`: при исчерпании запрос
+    ждет свободное соединение до `pool_timeout` секунд, а не открывает новое.
+    """
+
+    def __init__(self, redis_settings: RedisSettings):
+        self.settings = redis_settings
+        self.pool = redis.BlockingConnectionPool(
+            host=redis_settings.host,
+            port=redis_settings.port,
+            db=redis_settings.db,
+            password=redis_settings.password or None,
+            max_connections=redis_settings.max_connections,
+            timeout=redis_settings.pool_timeout,
+            socket_timeout=redis_settings.socket_timeout,
+            socket_connect_timeout=redis_settings.socket_connect_timeout,
+            health_check_interval=redis_settings.health_check_interval,
+            decode_responses=True,
+        )
+        self.redis = redis.Redis(connection_pool=self.pool)
+
+        self._verify_code = self.redis.register_script(VERIFY_CODE_SCRIPT)
+
+    async def warm_up(self) -> None:
+        """
+        Открывает `warmup_connections` соединений заранее, чтобы первые запросы
+        не тратили время на установку соединения.
+        Одновременные PING занимают каждый свое соединение, после чего они остаются в пуле.
+        """
+        connections = min(self.settings.warmup_connections, self.settings.max_connections)
+        await asyncio.gather(*(self.redis.ping() for _ in range(connections)))
 
-        # Добавляем password если указан
-        if settings.redis.password:
-            redis_kwargs["password"] = settings.redis.password
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = True) -> AsyncIterator[Pipeline]:
+        """
+        Отправляет команды, добавленные в блоке, одним запросом при выходе из блока.
+        При `transaction=True` команды выполняются атомарно (`MULTI`/`EXEC`).
+        Результаты команд в порядке добавления - в `pipe.results`.
+
+        ```python
+        async with redis_client.pipeline() as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+        value, ttl = pipe.results
+        ```
+        """
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+            pipe.results = await pipe.execute()
 
-        self.redis = redis.Redis(**redis_kwargs)
+    @staticmethod
+    def _verification_keys(email: str) -> list[str]:
+        return [f"verification_code:{email}", f"verification_attempts:{email}"]
 
     async def set_verification_code(self, email: str, code: str) -> bool:
         """
-        Сохраняет код верификации для email с TTL
+        Сохраняет код верификации для email с TTL и сбрасывает счетчик неудачных попыток
 
         Args:
             email: Email пользователя
@@ -31,54 +125,50 @@ class RedisClient:
         Returns:
             bool: True если код успешно сохранен
         """
+        code_key, attempts_key = self._verification_keys(email)
         try:
-            key = f"verification_code:{email}"
-            await self.redis.setex(key, settings.redis.verification_code_ttl, code)
+            async with self.pipeline() as pipe:
+                pipe.setex(code_key, self.settings.verification_code_ttl, code)
+                pipe.delete(attempts_key)
             return True
         except Exception as e:
             print(f"Redis error: {e}")
             return False
 
-    async def get_verification_code(self, email: str) -> str | None:
+    async def check_verification_code(self, email: str, code: str) -> VerificationResult:
         """
-        Получает код верификации для email
+        Атомарно проверяет код верификации за один запрос к Redis: верный код
+        удаляется (повторно его использовать нельзя), неверный увеличивает счетчик
+        попыток, после `verification_max_attempts` неверных попыток код удаляется.
 
         Args:
             email: Email пользователя
+            code: Предъявленный код
 
         Returns:
-            str | None: Код верификации или None если не найден/истек
+            VerificationResult: результат проверки и количество оставшихся попыток
         """
+        max_attempts = self.settings.verification_max_attempts
         try:
-            key = f"verification_code:{email}"
-            code = await self.redis.get(key)
-            return code
+            status, attempts = await self._verify_code(
+                keys=self._verification_keys(email), args=[code, max_attempts]
+            )
         except Exception as e:
             print(f"Redis error: {e}")
-            return None
-
-    async def delete_verification_code(self, email: str) -> bool:
-        """
-        Удаляет код верификации для email
+            return VerificationResult(VerificationStatus.UNAVAILABLE, 0)
 
-        Args:
-            email: Email пользователя
-
-        Returns:
-            bool: True если код успешно удален
-        """
-        try:
-            key = f"verification_code:{email}"
-            result = await self.redis.delete(key)
-            return result > 0
-        except Exception as e:
-            print(f"Redis error: {e}")
-            return False
+        status = VerificationStatus(int(status))
+        # попытки остаются, только пока код не удален
+        attempts_left = (
+            max_attempts - int(attempts) if status == VerificationStatus.INVALID else 0
+        )
+        return VerificationResult(status=status, attempts_left=attempts_left)
 
     async def close(self):
-        """Закрывает соединение с Redis"""
-        await self.redis.close()
+        """Закрывает все соединения пула"""
+        await self.redis.aclose()
+        await self.pool.aclose()
 
 
 # Глобальный экземпляр Redis клиента
-redis_client = RedisClient()
+redis_client = RedisClient(settings.redis)
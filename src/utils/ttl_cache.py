@@ -0,0 +1,99 @@
+import time
+from typing import Generic, TypeVar, Callable
+from collections import OrderedDict
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+
+    Время истечения записей задается в Unix timestamp (`time.time()`),
+    чтобы его можно было согласовать с `exp` токенов.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        on_evict: Callable[[K, V], None] | None = None,
+    ):
+        """
+        Args:
+            - `maxsize`: максимальное количество записей
+            - `ttl`: время жизни записи по умолчанию в секундах (`None` - без ограничения)
+            - `on_evict`: вызывается при удалении записи из кэша
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+
+        self.hits = 0
+        self.misses = 0
+
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        """Возвращает значение по ключу или `None`, если записи нет или она истекла"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            self.pop(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """
+        Сохраняет значение. Запись истекает в `expires_at`, но не позже,
+        чем через `ttl` секунд.
+        """
+        if self.ttl is not None:
+            ttl_expires_at = time.time() + self.ttl
+            expires_at = min(expires_at or ttl_expires_at, ttl_expires_at)
+
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (value, expires_at)
+
+        while len(self._data) > self.maxsize:
+            old_key, (old_value, _) = self._data.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key: K) -> V | None:
+        """Удаляет запись и возвращает ее значение"""
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+
+        if self.on_evict:
+            self.on_evict(key, item[0])
+        return item[0]
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self.pop(key)
+
+    def stats(self) -> dict:
+        """Возвращает счетчики попаданий и промахов"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }